@@ -1,16 +1,22 @@
 import uuid
+from typing import AsyncGenerator, AsyncIterator, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
+from fastapi.responses import StreamingResponse
 from fastapi.websockets import WebSocket, WebSocketDisconnect
 
+from app.dependencies import get_chats_service, get_ws_manager
 from app.exceptions.chat import ChatAccessForbiddenException, ChatNotFoundException
 from app.filters.base import BaseFilter
+from app.filters.chats import InboxFilter
+from app.filters.cursors import next_inbox_cursor, next_messages_cursor, next_search_cursor
+from app.filters.messages import MessagesFilter
+from app.filters.search import SearchFilter
 from app.interfaces.managers import ConnectionsManagerInterface
 from app.interfaces.services import ChatsServiceInterface
-from app.managers.connections import get_ws_manager
-from app.schemas.chats import ChatCreateSchema, ChatSchema
-from app.schemas.messages import MessageSchema
-from app.services.chats import get_chats_service
+from app.managers.frames import Frame
+from app.schemas.chats import ChatCreateSchema, ChatSchema, InboxChatSchema
+from app.schemas.messages import MessageSchema, MessageSearchHitSchema
 from app.utils import get_current_user_id
 
 router = APIRouter(
@@ -29,6 +35,61 @@ async def get_my_chats(
     return chats
 
 
+@router.get("/inbox")
+async def get_inbox(
+        response: Response,
+        user_id: uuid.UUID = Depends(get_current_user_id),
+        filters: InboxFilter = Depends(),
+        chats_service: ChatsServiceInterface = Depends(get_chats_service),
+) -> list[InboxChatSchema]:
+    chats = await chats_service.get_inbox(user_id, filters)
+    next_cursor = next_inbox_cursor(chats, filters)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return chats
+
+
+@router.get("/search")
+async def search_messages(
+        user_id: uuid.UUID = Depends(get_current_user_id),
+        filters: SearchFilter = Depends(),
+        chat_service: ChatsServiceInterface = Depends(get_chats_service),
+) -> StreamingResponse:
+    if filters.chat_id:
+        chat = await chat_service.get_chat_by_id(filters.chat_id)
+        if not chat:
+            raise ChatNotFoundException
+        chat_users = (chat.user1_id, chat.user2_id)
+        if user_id not in chat_users:
+            raise ChatAccessForbiddenException
+    hits = chat_service.search_messages(user_id, filters)
+    # первый результат читаем до ответа, чтобы таймаут запроса вернулся как 503, а не оборванный поток
+    first = await anext(hits, None)
+    return StreamingResponse(_stream_search_hits(first, hits, filters), media_type="application/json")
+
+
+async def _stream_search_hits(
+        first: Optional[MessageSearchHitSchema],
+        hits: AsyncGenerator[MessageSearchHitSchema, None],
+        filters: SearchFilter,
+) -> AsyncIterator[str]:
+    """Результаты уходят клиенту по мере чтения из БД: {"hits": [...], "next_cursor": ...}."""
+    try:
+        yield '{"hits":['
+        last, count = first, 0
+        if first is not None:
+            yield first.model_dump_json()
+            count = 1
+            async for hit in hits:
+                yield "," + hit.model_dump_json()
+                last, count = hit, count + 1
+    finally:
+        # при обрыве клиента соединение из пула возвращается сразу, а не при сборке мусора
+        await hits.aclose()
+    next_cursor = next_search_cursor(last, count, filters)
+    yield '],"next_cursor":' + ('"%s"' % next_cursor if next_cursor else "null") + "}"
+
+
 @router.post("/create_chat")
 async def create_chat(
         chat_create_data: ChatCreateSchema,
@@ -36,8 +97,7 @@ async def create_chat(
         ws_manager: ConnectionsManagerInterface = Depends(get_ws_manager),
 ) -> ChatSchema:
     chat = await chats_service.create_chat(chat_create_data)
-    users = (str(chat.user1_id), str(chat.user2_id))
-    await ws_manager.send_chat(users, chat)
+    await ws_manager.send_chat(chat)
     return chat
 
 
@@ -50,21 +110,25 @@ async def get_my_chats_ws(
 ) -> None:
     token = websocket.headers.get("Authorization")
     user_id = get_current_user_id(token)
-    await ws_manager.connect(user_id, websocket)
-    chats = await chats_service.get_my_chats(user_id, filters)
-    for chat in chats:
-        await websocket.send_text(chat.json())
+    connection = await ws_manager.connect_user(user_id, websocket)
     try:
+        chats = await chats_service.get_my_chats(user_id, filters)
+        for chat in chats:
+            await connection.send(Frame(chat))
         while True:
-            await websocket.receive_text()
-    except WebSocketDisconnect:
-        await ws_manager.disconnect(user_id, websocket)
+            await connection.receive()
+    except (WebSocketDisconnect, ValueError):
+        pass
+    finally:
+        # сокет не должен остаться в реестре ни при какой ошибке
+        await ws_manager.disconnect(websocket)
 
 
 @router.get("/{chat_id}")
 async def get_messages(
         chat_id: uuid.UUID,
-        filters: BaseFilter = Depends(),
+        response: Response,
+        filters: MessagesFilter = Depends(),
         user_id: uuid.UUID = Depends(get_current_user_id),
         chat_service: ChatsServiceInterface = Depends(get_chats_service),
 ) -> list[MessageSchema]:
@@ -75,14 +139,32 @@ async def get_messages(
     if user_id not in chat_users:
         raise ChatAccessForbiddenException
     messages = await chat_service.get_chat_messages(chat_id, filters)
+    next_cursor = next_messages_cursor(messages, filters)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return messages
 
 
+@router.post("/{chat_id}/read")
+async def mark_chat_read(
+        chat_id: uuid.UUID,
+        user_id: uuid.UUID = Depends(get_current_user_id),
+        chat_service: ChatsServiceInterface = Depends(get_chats_service),
+) -> None:
+    chat = await chat_service.get_chat_by_id(chat_id)
+    if not chat:
+        raise ChatNotFoundException
+    chat_users = (chat.user1_id, chat.user2_id)
+    if user_id not in chat_users:
+        raise ChatAccessForbiddenException
+    await chat_service.mark_chat_read(chat_id, user_id)
+
+
 @router.websocket("/ws/{chat_id}")
 async def connect_to_chat_by_id(
         chat_id: uuid.UUID,
         websocket: WebSocket,
-        filters: BaseFilter = Depends(),
+        filters: MessagesFilter = Depends(),
         ws_manager: ConnectionsManagerInterface = Depends(get_ws_manager),
         chat_service: ChatsServiceInterface = Depends(get_chats_service),
 ) -> None:
@@ -92,15 +174,18 @@ async def connect_to_chat_by_id(
     if not chat:
         raise ChatNotFoundException
     chat_users = (chat.user1_id, chat.user2_id)
-    if uuid.UUID(user_id) not in chat_users:
+    if user_id not in chat_users:
         raise ChatAccessForbiddenException
-    await ws_manager.connect(chat_id, websocket)
-    messages = await chat_service.get_chat_messages(chat_id, filters)
-    for message in messages:
-        await websocket.send_text(message.json())
+    connection = await ws_manager.connect_chat(chat_id, websocket)
     try:
+        # отметка прочтения — только через POST /chats/{chat_id}/read, переподключения не пишут в БД
+        messages = await ws_manager.get_history(chat_id, filters)
+        for message in messages:
+            await connection.send(Frame(message))
         while True:
-            message = await websocket.receive_text()
+            message = await connection.receive()
             await ws_manager.send_message(chat_id, user_id, message)
-    except WebSocketDisconnect:
-        await ws_manager.disconnect(chat_id, websocket)
+    except (WebSocketDisconnect, ValueError):
+        pass
+    finally:
+        await ws_manager.disconnect(websocket)
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from app.container import Container
+from app.dependencies import get_container
+
+router = APIRouter(
+    prefix="/health",
+    tags=["Health"]
+)
+
+
+@router.get("/live")
+async def live() -> dict:
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready(container: Container = Depends(get_container)) -> JSONResponse:
+    """200 только после старта брокеров и прогрева пула соединений."""
+    if not container.ready:
+        return JSONResponse({"status": "starting"}, status_code=503)
+    return JSONResponse({"status": "ready"})
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from app.container import Container
+from app.dependencies import get_container
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(container: Container = Depends(get_container)) -> Response:
+    return Response(container.metrics.render(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from aiokafka import AIOKafkaConsumer
+from aiokafka.errors import KafkaError
+
+from app.configs.main import settings
+from app.interfaces.brokers import BackplaneHandler, BackplaneInterface, KafkaProducerInterface
+
+
+class LoopbackBackplane(BackplaneInterface):
+    """Backplane внутри одного процесса. Используется в тестах и при запуске в один воркер."""
+
+    def __init__(self, logger: logging.Logger):
+        self.handlers: dict[str, BackplaneHandler] = {}
+        self.logger = logger
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def subscribe(self, node_id: str, handler: BackplaneHandler) -> None:
+        self.handlers[node_id] = handler
+
+    async def publish(self, node_id: str, kind: str, data: dict) -> None:
+        for handler_node_id, handler in list(self.handlers.items()):
+            if handler_node_id == node_id:
+                continue
+            try:
+                await handler(kind, data)
+            except Exception as e:
+                self.logger.error("Backplane handler %s failed: %s", handler_node_id, e)
+
+
+class KafkaBackplane(BackplaneInterface):
+    """Backplane поверх Kafka.
+
+    Каждый воркер читает топик без consumer group, поэтому получает все события,
+    и пропускает те, что опубликовал сам.
+    """
+
+    def __init__(
+            self,
+            kafka_url: str,
+            producer: KafkaProducerInterface,
+            logger: logging.Logger,
+    ):
+        self.topic = producer.messages_topic
+        self.consumer = AIOKafkaConsumer(
+            self.topic,
+            bootstrap_servers=kafka_url,
+            group_id=None,
+            auto_offset_reset="latest",
+        )
+        self.producer = producer
+        self.logger = logger
+        self.handlers: dict[str, BackplaneHandler] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await self.consumer.start()
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        if self.consumer:
+            await self.consumer.stop()
+            self.consumer = None
+
+    def subscribe(self, node_id: str, handler: BackplaneHandler) -> None:
+        self.handlers[node_id] = handler
+
+    async def publish(self, node_id: str, kind: str, data: dict) -> None:
+        await self.producer.sent_message(
+            self.topic,
+            {"origin": node_id, "kind": kind, "data": data},
+            key=data.get("chat_id"),
+        )
+
+    async def _listen(self) -> None:
+        try:
+            async for record in self.consumer:
+                try:
+                    event = json.loads(record.value.decode("utf-8"))
+                    # в том же топике лежат доменные события сервиса, у них нет origin
+                    origin, kind, data = event["origin"], event["kind"], event["data"]
+                except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError):
+                    continue
+                for node_id, handler in list(self.handlers.items()):
+                    if node_id == origin:
+                        continue
+                    try:
+                        await handler(kind, data)
+                    except Exception as e:
+                        self.logger.error("Backplane handler %s failed: %s", node_id, e)
+        except KafkaError as e:
+            self.logger.error("Backplane stopped listening: %s", e)
+
+
+def build_backplane(producer: KafkaProducerInterface, logger: logging.Logger) -> BackplaneInterface:
+    if settings.websocket.WS_BACKPLANE == "kafka":
+        return KafkaBackplane(
+            kafka_url=settings.kafka.KAFKA_URL,
+            producer=producer,
+            logger=logger,
+        )
+    return LoopbackBackplane(logger=logger)
@@ -1,50 +1,81 @@
+import asyncio
+import base64
 import json
 import logging
-from typing import AsyncGenerator, Optional
+from typing import Any, AsyncGenerator, Callable, Hashable, Optional
 
-from aiokafka import AIOKafkaConsumer, ConsumerRecord
+from aiokafka import AIOKafkaConsumer, ConsumerRecord, TopicPartition
 from aiokafka.errors import KafkaError
+from pydantic import ValidationError
+from sqlalchemy.exc import DataError, IntegrityError
 
+from app.brokers.flow import FlowController
+from app.brokers.pool import KeyedWorkerPool
 from app.configs.main import settings
+from app.exceptions.chat import ChatExistsException
+from app.interfaces.brokers import KafkaProducerInterface
 from app.interfaces.managers import ConnectionsManagerInterface
 from app.interfaces.services import ChatsServiceInterface
-from app.logger import get_logger
-from app.managers.connections import get_ws_manager
-from app.schemas.chats import ChatCreateSchema
-from app.services.chats import get_chats_service
+from app.schemas.chats import ChatCreateSchema, ChatSchema
+from app.services.batching import MessageBatchWriter
 
+# Ошибки самой записи: повтор даст тот же результат, запись уходит в dead-letter топик.
+# Остальные (сбой БД, сети) считаются временными и не должны терять матчи.
+POISON_ERRORS = (IntegrityError, DataError, ValidationError)
 
-class KafkaConsumer:
-    _instance: Optional["KafkaConsumer"] = None
-
-    def __new__(cls, kafka_url: str, group_id: str, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
 
+class KafkaConsumer:
     def __init__(
             self,
             kafka_url: str,
             group_id: str,
             chats_service: ChatsServiceInterface,
             ws_manager: ConnectionsManagerInterface,
+            producer: KafkaProducerInterface,
             logger: logging.Logger,
+            batch_size: int = settings.kafka.KAFKA_CONSUMER_BATCH_SIZE,
+            batch_wait_ms: int = settings.kafka.KAFKA_CONSUMER_BATCH_WAIT_MS,
+            workers: int = settings.kafka.KAFKA_CONSUMER_WORKERS,
+            worker_key: str = settings.kafka.KAFKA_CONSUMER_WORKER_KEY,
+            flow: Optional[FlowController] = None,
     ):
-        if not hasattr(self, 'consumer'):
-            self.consumer = AIOKafkaConsumer(
-                bootstrap_servers=kafka_url,
-                group_id=group_id,
-                enable_auto_commit=True
-            )
-            self.chats_service = chats_service
-            self.ws_manager = ws_manager
-            self.logger = logger
-            self.subscribed_topics = []
+        # Оффсеты коммитим вручную, только после сохранения пачки
+        self.consumer = AIOKafkaConsumer(
+            bootstrap_servers=kafka_url,
+            group_id=group_id,
+            enable_auto_commit=False,
+            max_poll_records=batch_size,
+        )
+        self.chats_service = chats_service
+        self.ws_manager = ws_manager
+        self.producer = producer
+        self.logger = logger
+        self.batch_size = batch_size
+        self.batch_wait_ms = batch_wait_ms
+        self.worker_key = worker_key
+        self.pool = KeyedWorkerPool(workers, self._persist_matches, logger) if workers > 1 else None
+        self.flow = flow
+        self.paused = False
+        self.pauses_total = 0
+        self.resumes_total = 0
+        self.partition_lag: dict[TopicPartition, int] = {}
+        self.counters = {
+            "processed": 0,
+            "duplicates": 0,
+            "retries": 0,
+            "dead_lettered": 0,
+            "restarts": 0,
+        }
+        self.subscribed_topics = []
 
     async def start(self) -> None:
         await self.consumer.start()
+        if self.pool:
+            self.pool.start()
 
     async def stop(self) -> None:
+        if self.pool:
+            await self.pool.stop()
         if self.consumer:
             await self.consumer.stop()
             self.consumer = None
@@ -53,44 +84,222 @@ class KafkaConsumer:
         self.subscribed_topics.extend(topics)
         self.consumer.subscribe(topics)
 
-    async def consume_messages(self) -> AsyncGenerator[ConsumerRecord, None]:
-        """Consume messages from subscribed topics."""
+    async def consume_batches(self) -> AsyncGenerator[dict[TopicPartition, list[ConsumerRecord]], None]:
+        """Consume batches of messages from subscribed topics."""
+        try:
+            while True:
+                await self._apply_backpressure()
+                batch = await self.consumer.getmany(timeout_ms=self.batch_wait_ms, max_records=self.batch_size)
+                if batch:
+                    yield batch
+        except KafkaError as e:
+            self.logger.error("Error while consuming messages: %s", e)
+
+    async def run(self) -> None:
+        """Супервизор: перезапускает цикл обработки после сбоев с нарастающей задержкой."""
+        failures = 0
+        while self.consumer is not None:
+            try:
+                await self.process_messages()
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                self.logger.exception("Consumer loop crashed: %s", e)
+            if self.consumer is None:
+                break
+            self.counters["restarts"] += 1
+            await asyncio.sleep(min(2 ** failures, settings.kafka.KAFKA_CONSUMER_RESTART_BACKOFF_MAX_S))
+            await self._rewind_to_committed()
+
+    async def _rewind_to_committed(self) -> None:
+        """Возвращаемся к закоммиченным оффсетам, чтобы не потерять незавершённую пачку."""
         try:
-            async for message in self.consumer:
-                yield message
-        except (KafkaError, json.JSONDecodeError, UnicodeDecodeError) as e:
-            self.logger.error(f"Error while consuming messages: {e}")
+            for partition in self.consumer.assignment():
+                committed = await self.consumer.committed(partition)
+                if committed is not None:
+                    self.consumer.seek(partition, committed)
+        except KafkaError as e:
+            self.logger.error("Failed to rewind consumer: %s", e)
 
     async def process_messages(self) -> None:
-        """Обрабатываем сообщения из Kafka."""
-        async for message in self.consume_messages():
-            if message.topic == "matches":
-                data = self._decode_message(message)
-                chat_data = ChatCreateSchema(
-                    user1_id=data["user1_id"],
-                    user2_id=data["user2_id"],
-                )
-                chat = await self.chats_service.create_chat(chat_data)
-                await self.ws_manager.send_chat(chat)
+        """Обрабатываем сообщения из Kafka пачками и коммитим оффсеты после сохранения."""
+        async for batch in self.consume_batches():
+            records = [record for partition_records in batch.values() for record in partition_records]
+            await self.process_batch(records)
+            await self.consumer.commit({
+                partition: partition_records[-1].offset + 1
+                for partition, partition_records in batch.items()
+            })
+            await self._update_lag(batch.keys())
+
+    async def _apply_backpressure(self) -> None:
+        """Приостанавливаем партиции, пока БД или рассылка не разгрузятся."""
+        if self.flow is None:
+            return
+        saturated = self.flow.saturated()
+        if not saturated:
+            return
+        self.paused = True
+        self.pauses_total += 1
+        self.logger.warning("Consumer paused, saturated: %s", ", ".join(saturated))
+        check_interval_ms = settings.kafka.KAFKA_FLOW_CHECK_INTERVAL_MS
+        while not self.flow.relieved():
+            # после ребалансировки назначение меняется, новые партиции тоже нужно приостановить
+            self.consumer.pause(*self.consumer.assignment())
+            # getmany не даёт выпасть из группы; выбранное до паузы возвращаем, иначе коммит его перешагнёт
+            batch = await self.consumer.getmany(timeout_ms=check_interval_ms)
+            for partition, records in batch.items():
+                self.consumer.seek(partition, records[0].offset)
+        # отозванные за время паузы партиции возобновлять нельзя
+        self.consumer.resume(*(self.consumer.paused() & self.consumer.assignment()))
+        self.paused = False
+        self.resumes_total += 1
+        self.logger.warning("Consumer resumed")
+
+    async def _update_lag(self, partitions) -> None:
+        for partition in partitions:
+            highwater = self.consumer.highwater(partition)
+            if highwater is not None:
+                self.partition_lag[partition] = highwater - await self.consumer.position(partition)
+
+    async def process_batch(self, records: list[ConsumerRecord]) -> None:
+        matches = []
+        for record in records:
+            if record.topic != "matches":
+                continue
+            try:
+                matches.append((record, self._decode_match(record)))
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                # битое сообщение повторять бессмысленно
+                await self._dead_letter(record, e, attempts=1)
+        if not matches:
+            return
+        if self.pool:
+            await self.pool.dispatch(matches, key=self._match_key)
+        else:
+            await self._persist_matches(matches)
 
-    def _decode_message(self, message: ConsumerRecord) -> dict:
+    async def _persist_matches(self, matches: list[tuple[ConsumerRecord, ChatCreateSchema]]) -> None:
         try:
-            data = json.loads(message.value.decode("utf-8"))
-            self.logger.info(f"Received message from topic {message.topic}: {data}")
-            return data
-        except json.JSONDecodeError as e:
-            self.logger.error(f"Failed to decode JSON: {e} | Raw message: {message.value}")
+            chats = await self.chats_service.create_chats([chat_data for _, chat_data in matches])
+        except Exception as e:
+            self.logger.warning("Batch of %d matches failed, retrying one by one: %s", len(matches), e)
+            chats = []
+            for record, chat_data in matches:
+                chat = await self._persist_match_with_retry(record, chat_data)
+                if chat:
+                    chats.append(chat)
+        else:
+            self.counters["duplicates"] += len(matches) - len(chats)
+        self.counters["processed"] += len(matches)
+        for chat in chats:
+            try:
+                await self.ws_manager.send_chat(chat)
+            except Exception as e:
+                self.logger.error("Failed to notify about chat %s: %s", chat.chat_id, e)
+
+    async def _persist_match_with_retry(
+            self,
+            record: ConsumerRecord,
+            chat_data: ChatCreateSchema,
+    ) -> Optional[ChatSchema]:
+        max_retries = settings.kafka.KAFKA_CONSUMER_MAX_RETRIES
+        for attempt in range(1, max_retries + 2):
+            try:
+                return await self.chats_service.create_chat(chat_data)
+            except ChatExistsException:
+                self.counters["duplicates"] += 1
+                return None
+            except POISON_ERRORS as e:
+                await self._dead_letter(record, e, attempts=attempt)
+                return None
+            except Exception:
+                if attempt > max_retries:
+                    # пачка не коммитится, супервизор вернёт консьюмер к закоммиченным оффсетам
+                    raise
+                self.counters["retries"] += 1
+                await asyncio.sleep(settings.kafka.KAFKA_CONSUMER_RETRY_BACKOFF_MS / 1000 * 2 ** (attempt - 1))
+
+    async def _dead_letter(self, record: ConsumerRecord, error: Exception, attempts: int) -> None:
+        """Отправляем запись в dead-letter топик вместе с описанием ошибки.
+
+        Ждём подтверждения брокера: если отправка не удалась, исключение
+        пробрасывается и пачка не коммитится.
+        """
+        await self.producer.send_batch([(settings.kafka.KAFKA_DEAD_LETTER_TOPIC, None, {
+            "topic": record.topic,
+            "partition": record.partition,
+            "offset": record.offset,
+            "key": base64.b64encode(record.key).decode() if record.key else None,
+            "value": base64.b64encode(record.value).decode() if record.value else None,
+            "error": f"{type(error).__name__}: {error}",
+            "attempts": attempts,
+        })])
+        self.counters["dead_lettered"] += 1
+
+    def _match_key(self, match: tuple[ConsumerRecord, ChatCreateSchema]) -> Hashable:
+        record, chat_data = match
+        if self.worker_key == "partition":
+            return record.topic, record.partition
+        return frozenset((chat_data.user1_id, chat_data.user2_id))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": self.pool.stats() if self.pool else [],
+            "paused": self.paused,
+            "pauses_total": self.pauses_total,
+            "resumes_total": self.resumes_total,
+            "pressure": self.flow.pressure() if self.flow else {},
+            "outcomes": dict(self.counters),
+            "lag": {f"{partition.topic}:{partition.partition}": lag for partition, lag in self.partition_lag.items()},
+        }
+
+    def _decode_match(self, message: ConsumerRecord) -> ChatCreateSchema:
+        data = json.loads(message.value.decode("utf-8"))
+        self.logger.info(
+            "Received match from %s", message.topic,
+            extra={"sample_key": "match_received", "partition": message.partition, "offset": message.offset},
+        )
+        return ChatCreateSchema(
+            user1_id=data["user1_id"],
+            user2_id=data["user2_id"],
+        )
+
 
+def build_kafka_consumer(
+        chats_service: ChatsServiceInterface,
+        ws_manager: ConnectionsManagerInterface,
+        producer: KafkaProducerInterface,
+        message_writer: Optional[MessageBatchWriter],
+        logger: logging.Logger,
+        pool_saturation: Callable[[], float],
+        serves_websockets: bool = True,
+        **options: Any,
+) -> KafkaConsumer:
+    """options переопределяют настройки пачек и пула воркеров из конфига.
 
-def get_kafka_consumer() -> KafkaConsumer:
-    chats_service = get_chats_service()
-    logger = get_logger()
-    ws_manager = get_ws_manager()
+    pool_saturation — загрузка пула primary, через который консьюмер пишет чаты.
+    serves_websockets=False — отдельный воркер: сокетов и записи сообщений в нём нет,
+    нагрузку показывает только пул БД.
+    """
+    probes = {"db_pool": (pool_saturation, settings.kafka.KAFKA_FLOW_MAX_POOL_SATURATION)}
+    if serves_websockets:
+        # сообщения, ожидающие записи в БД или отправки в сокеты
+        probes["in_flight"] = (
+            lambda: ws_manager.pending_frames() + (message_writer.queue.qsize() if message_writer else 0),
+            settings.kafka.KAFKA_FLOW_MAX_IN_FLIGHT,
+        )
+    flow = FlowController(probes=probes, resume_ratio=settings.kafka.KAFKA_FLOW_RESUME_RATIO)
 
     return KafkaConsumer(
         kafka_url=settings.kafka.KAFKA_URL,
         group_id="chats",
         chats_service=chats_service,
         ws_manager=ws_manager,
+        producer=producer,
         logger=logger,
+        flow=flow,
+        **options,
     )
@@ -0,0 +1,25 @@
+from typing import Callable
+
+Probe = tuple[Callable[[], float], float]
+
+
+class FlowController:
+    """Решает, когда приостановить чтение из Kafka.
+
+    Каждая проба — текущее значение и порог. Пауза включается, когда любая проба
+    достигает порога, и снимается, когда все опускаются ниже resume_ratio от порога.
+    """
+
+    def __init__(self, probes: dict[str, Probe], resume_ratio: float):
+        self.probes = probes
+        self.resume_ratio = resume_ratio
+
+    def pressure(self) -> dict[str, float]:
+        """Загрузка по каждой пробе в долях от порога."""
+        return {name: probe() / limit for name, (probe, limit) in self.probes.items() if limit > 0}
+
+    def saturated(self) -> list[str]:
+        return [name for name, load in self.pressure().items() if load >= 1]
+
+    def relieved(self) -> bool:
+        return all(load <= self.resume_ratio for load in self.pressure().values())
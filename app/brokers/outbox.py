@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from typing import Optional
+
+from app.configs.main import settings
+from app.interfaces.brokers import KafkaProducerInterface
+from app.interfaces.repositories import OutboxRepositoryInterface
+from app.schemas.outbox import OutboxEventSchema
+
+
+class OutboxRelay:
+    """Переносит события из outbox в Kafka пачками.
+
+    Пока outbox не пуст, пачки забираются без пауз, иначе релей спит poll_interval_ms.
+    Событие удаляется только после подтверждения брокера, поэтому доставка at-least-once.
+    """
+
+    def __init__(
+            self,
+            outbox_repository: OutboxRepositoryInterface,
+            producer: KafkaProducerInterface,
+            logger: logging.Logger,
+            batch_size: int = settings.kafka.KAFKA_OUTBOX_BATCH_SIZE,
+            poll_interval_ms: int = settings.kafka.KAFKA_OUTBOX_POLL_INTERVAL_MS,
+    ):
+        self.outbox_repository = outbox_repository
+        self.producer = producer
+        self.logger = logger
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval_ms / 1000
+        self.relayed = 0
+        self.failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict[str, int]:
+        return {"relayed": self.relayed, "failures": self.failures}
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                relayed = await self.outbox_repository.relay_batch(self.batch_size, self._deliver)
+            except Exception as e:
+                self.failures += 1
+                self.logger.error("Outbox relay failed: %s", e)
+                relayed = 0
+            self.relayed += relayed
+            if relayed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _deliver(self, events: list[OutboxEventSchema]) -> None:
+        await self.producer.send_batch([(event.topic, event.key, event.payload) for event in events])
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class WorkerStats:
+    __slots__ = ("pending", "processed", "batches", "busy_seconds", "last_batch_seconds")
+
+    def __init__(self):
+        self.pending = 0
+        self.processed = 0
+        self.batches = 0
+        self.busy_seconds = 0.0
+        self.last_batch_seconds = 0.0
+
+
+class KeyedWorkerPool:
+    """Ограниченный пул асинхронных воркеров.
+
+    Элементы с одинаковым ключом всегда попадают в один воркер и обрабатываются
+    в порядке поступления, элементы с разными ключами — параллельно.
+    """
+
+    def __init__(
+            self,
+            size: int,
+            handler: Callable[[list[Any]], Awaitable[None]],
+            logger: logging.Logger,
+    ):
+        self.size = size
+        self.handler = handler
+        self.logger = logger
+        self.queues: list[asyncio.Queue[tuple[list[Any], asyncio.Future]]] = [asyncio.Queue() for _ in range(size)]
+        self.stats_by_worker = [WorkerStats() for _ in range(size)]
+        self._workers: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._workers = [asyncio.create_task(self._work(index)) for index in range(self.size)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def dispatch(self, items: list[Any], key: Callable[[Any], Hashable]) -> None:
+        """Раскладываем элементы по воркерам и ждём обработки всех. Исключение воркера пробрасывается."""
+        groups: dict[int, list[Any]] = {}
+        for item in items:
+            groups.setdefault(hash(key(item)) % self.size, []).append(item)
+        loop = asyncio.get_running_loop()
+        futures = []
+        for index, group in groups.items():
+            future = loop.create_future()
+            self.stats_by_worker[index].pending += len(group)
+            self.queues[index].put_nowait((group, future))
+            futures.append(future)
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "worker": index,
+                "lag": stats.pending,
+                "processed": stats.processed,
+                "batches": stats.batches,
+                "busy_seconds": stats.busy_seconds,
+                "last_batch_seconds": stats.last_batch_seconds,
+            }
+            for index, stats in enumerate(self.stats_by_worker)
+        ]
+
+    async def _work(self, index: int) -> None:
+        queue, stats = self.queues[index], self.stats_by_worker[index]
+        while True:
+            items, future = await queue.get()
+            started = time.perf_counter()
+            error: Optional[Exception] = None
+            try:
+                await self.handler(items)
+            except Exception as e:
+                self.logger.error("Consumer worker %d failed: %s", index, e)
+                error = e
+            elapsed = time.perf_counter() - started
+            stats.pending -= len(items)
+            stats.processed += len(items)
+            stats.batches += 1
+            stats.busy_seconds += elapsed
+            stats.last_batch_seconds = elapsed
+            if not future.done():
+                if error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(None)
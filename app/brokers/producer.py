@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 from typing import Optional
@@ -6,40 +7,58 @@ from aiokafka import AIOKafkaProducer
 
 from app.configs.main import settings
 from app.interfaces.brokers import KafkaProducerInterface
-from app.logger import get_logger
 
 
 class KafkaProducer(KafkaProducerInterface):
     chats_topic: str
     messages_topic: str
-    _instance: Optional["KafkaProducer"] = None
-
-    def __new__(cls, kafka_url: str, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
 
     def __init__(self, kafka_url: str, logger: logging.Logger):
-        if not hasattr(self, 'producer'):
-            self.producer = AIOKafkaProducer(bootstrap_servers=kafka_url)
-            self.logger = logger
-            self.chats_topic = "chats"
-            self.messages_topic = "messages"
+        self.producer = AIOKafkaProducer(
+            bootstrap_servers=kafka_url,
+            linger_ms=settings.kafka.KAFKA_PRODUCER_LINGER_MS,
+            max_batch_size=settings.kafka.KAFKA_PRODUCER_MAX_BATCH_SIZE,
+            compression_type=settings.kafka.KAFKA_PRODUCER_COMPRESSION or None,
+            acks=settings.kafka.KAFKA_PRODUCER_ACKS,
+        )
+        self.logger = logger
+        self.chats_topic = settings.kafka.KAFKA_CHATS_TOPIC
+        self.messages_topic = settings.kafka.KAFKA_MESSAGES_TOPIC
+        self.counters = {"sent": 0, "failed": 0}
 
     async def start(self) -> None:
         await self.producer.start()
 
     async def stop(self) -> None:
         if self.producer:
+            # stop() дождётся отправки накопленных батчей
             await self.producer.stop()
             self.producer = None
 
-    async def sent_message(self, topic: str, data: dict) -> None:
+    async def sent_message(self, topic: str, data: dict, key: Optional[str] = None) -> None:
+        """Кладём запись в аккумулятор aiokafka; подтверждение брокера учитывается в счётчиках."""
         message = json.dumps(data)
-        await self.producer.send(topic, message.encode("utf-8"))
-        self.logger.info(f"Message sent to Kafka topic {topic}: {message}")
+        delivery = await self.producer.send(topic, message.encode("utf-8"), key=key.encode("utf-8") if key else None)
+        delivery.add_done_callback(self._on_delivery)
+
+    async def send_batch(self, records: list[tuple[str, Optional[str], dict]]) -> None:
+        """Отправляем пачку и ждём подтверждения брокера для каждой записи."""
+        deliveries = [
+            await self.producer.send(
+                topic,
+                json.dumps(data).encode("utf-8"),
+                key=key.encode("utf-8") if key else None,
+            )
+            for topic, key, data in records
+        ]
+        await asyncio.gather(*deliveries)
+        self.counters["sent"] += len(records)
 
+    def stats(self) -> dict[str, int]:
+        return dict(self.counters)
 
-def get_kafka_producer() -> KafkaProducer:
-    logger = get_logger()
-    return KafkaProducer(settings.kafka.KAFKA_URL, logger)
+    def _on_delivery(self, delivery: asyncio.Future) -> None:
+        if delivery.cancelled() or delivery.exception():
+            self.counters["failed"] += 1
+        else:
+            self.counters["sent"] += 1
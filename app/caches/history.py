@@ -0,0 +1,109 @@
+import uuid
+from collections import OrderedDict, deque
+from typing import Optional
+
+from app.filters.messages import MessagesFilter
+from app.schemas.messages import MessageSchema
+
+
+class ChatHistory:
+    __slots__ = ("messages", "ids", "warmed", "complete")
+
+    def __init__(self, size: int):
+        # от старых к новым
+        self.messages: deque[MessageSchema] = deque(maxlen=size)
+        # message_id сообщений в буфере, для проверки дубликатов без обхода deque
+        self.ids: set[uuid.UUID] = set()
+        self.warmed = False
+        # в буфере вся история чата, а не только последние size сообщений
+        self.complete = False
+
+
+class RecentMessagesBuffer:
+    """Кольцевой буфер последних сообщений по каждому чату.
+
+    Чат прогревается лениво при первом чтении, дальше пополняется при записи.
+    Ограничены и общее число сообщений, и число чатов: пустые чаты сообщений
+    не добавляют, но занимают память. Холодные чаты вытесняются по LRU.
+    """
+
+    def __init__(self, per_chat: int, max_messages: int, max_chats: int):
+        self.per_chat = per_chat
+        self.max_messages = max_messages
+        self.max_chats = max_chats
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = 0
+        self._chats: OrderedDict[uuid.UUID, ChatHistory] = OrderedDict()
+
+    def can_serve(self, filters: MessagesFilter) -> bool:
+        return not filters.before and not filters.after and filters.offset + filters.limit <= self.per_chat
+
+    def get(self, chat_id: uuid.UUID, filters: MessagesFilter) -> Optional[list[MessageSchema]]:
+        """Сообщения от новых к старым или None, если запрос нельзя обслужить из памяти."""
+        history = self._chats.get(chat_id)
+        if history is None or not history.warmed or not self.can_serve(filters):
+            self.misses += 1
+            return None
+        if filters.offset + filters.limit > len(history.messages) and not history.complete:
+            self.misses += 1
+            return None
+        self._chats.move_to_end(chat_id)
+        self.hits += 1
+        newest_first = list(reversed(history.messages))
+        return newest_first[filters.offset:filters.offset + filters.limit]
+
+    def begin_warm(self, chat_id: uuid.UUID) -> None:
+        """Заводим буфер до запроса в БД, чтобы не потерять сообщения, записанные во время прогрева."""
+        if chat_id not in self._chats:
+            self._chats[chat_id] = ChatHistory(self.per_chat)
+            self._evict()
+
+    def warm(self, chat_id: uuid.UUID, messages: list[MessageSchema]) -> None:
+        """messages — последние сообщения чата из БД, от новых к старым."""
+        history = self._chats.get(chat_id)
+        if history is None:
+            return
+        merged = {message.message_id: message for message in messages}
+        merged.update((message.message_id, message) for message in history.messages)
+        ordered = sorted(merged.values(), key=lambda message: (message.created_at, message.message_id))
+        self._size -= len(history.messages)
+        history.messages.clear()
+        history.messages.extend(ordered)
+        history.ids = {message.message_id for message in history.messages}
+        self._size += len(history.messages)
+        history.warmed = True
+        history.complete = len(messages) < self.per_chat
+        self._evict()
+
+    def append(self, message: MessageSchema) -> None:
+        history = self._chats.get(message.chat_id)
+        if history is None:
+            return
+        if message.message_id in history.ids:
+            return
+        if len(history.messages) == history.messages.maxlen:
+            history.complete = False
+            history.ids.discard(history.messages[0].message_id)
+        else:
+            self._size += 1
+        history.messages.append(message)
+        history.ids.add(message.message_id)
+        self._chats.move_to_end(message.chat_id)
+        self._evict()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "chats": len(self._chats),
+            "messages": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _evict(self) -> None:
+        while (self._size > self.max_messages or len(self._chats) > self.max_chats) and len(self._chats) > 1:
+            _, history = self._chats.popitem(last=False)
+            self._size -= len(history.messages)
+            self.evictions += 1
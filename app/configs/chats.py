@@ -0,0 +1,27 @@
+from app.configs.base import BaseConfig
+
+
+class ChatsConfig(BaseConfig):
+    # Пакетная запись сообщений: пачка уходит в БД по заполнении или по истечении окна
+    MESSAGES_BATCH_ENABLED: bool = True
+    MESSAGES_BATCH_SIZE: int = 200
+    MESSAGES_BATCH_WINDOW_MS: int = 5
+    # Кэш чатов по chat_id; для несуществующих id — короткий отрицательный TTL
+    CHATS_CACHE_SIZE: int = 10000
+    CHATS_CACHE_TTL: float = 300
+    CHATS_CACHE_NEGATIVE_TTL: float = 5
+    # Буфер последних сообщений для отдачи истории при подключении к сокету чата
+    HISTORY_BUFFER_SIZE: int = 50
+    HISTORY_BUFFER_MAX_MESSAGES: int = 200000
+    HISTORY_BUFFER_MAX_CHATS: int = 20000
+    # Помесячные секции messages: сколько месяцев создавать заранее
+    MESSAGES_PARTITIONS_AHEAD: int = 3
+    # Секции старше RETENTION_DAYS выгружаются в ARCHIVE_DIR и удаляются из БД.
+    # Задача запускается в python -m app.worker раз в RETENTION_INTERVAL_S
+    MESSAGES_RETENTION_ENABLED: bool = False
+    MESSAGES_RETENTION_DAYS: int = 180
+    MESSAGES_RETENTION_INTERVAL_S: float = 3600
+    MESSAGES_ARCHIVE_DIR: str = "archive/messages"
+    # Ограничение времени поискового запроса, чтобы он не держал соединение пула
+    SEARCH_STATEMENT_TIMEOUT_MS: int = 2000
+    SEARCH_MAX_LIMIT: int = 100
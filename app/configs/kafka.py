@@ -4,6 +4,38 @@ from app.configs.base import BaseConfig
 class KafkaConfig(BaseConfig):
     KAFKA_HOST: str
     KAFKA_PORT: int
+    # false — веб-воркеры не читают Kafka, консьюмер запускается отдельно: python -m app.worker
+    KAFKA_CONSUMER_IN_WEB: bool = True
+    # Пачка для getmany: до BATCH_SIZE записей или BATCH_WAIT_MS ожидания
+    KAFKA_CONSUMER_BATCH_SIZE: int = 500
+    KAFKA_CONSUMER_BATCH_WAIT_MS: int = 100
+    # Пул воркеров внутри пачки: 1 — последовательная обработка.
+    # Ключ распределения: pair — пара пользователей, partition — партиция топика
+    KAFKA_CONSUMER_WORKERS: int = 1
+    KAFKA_CONSUMER_WORKER_KEY: str = "pair"
+    KAFKA_CHATS_TOPIC: str = "chats"
+    KAFKA_MESSAGES_TOPIC: str = "messages"
+    # Продюсер: батчинг и сжатие на стороне aiokafka
+    KAFKA_PRODUCER_LINGER_MS: int = 5
+    KAFKA_PRODUCER_MAX_BATCH_SIZE: int = 65536
+    KAFKA_PRODUCER_COMPRESSION: str = "gzip"
+    KAFKA_PRODUCER_ACKS: int = 1
+    # Изоляция ошибок: битые записи — в dead-letter топик, временные сбои — повторы, затем перезапуск с оффсетов
+    KAFKA_CONSUMER_MAX_RETRIES: int = 3
+    KAFKA_CONSUMER_RETRY_BACKOFF_MS: int = 100
+    KAFKA_CONSUMER_RESTART_BACKOFF_MAX_S: float = 30
+    KAFKA_DEAD_LETTER_TOPIC: str = "matches.dlq"
+    # Backpressure: партиции ставятся на паузу при достижении любого порога
+    # и возобновляются, когда все показатели опустятся ниже RESUME_RATIO от порогов
+    KAFKA_FLOW_MAX_IN_FLIGHT: int = 50000
+    KAFKA_FLOW_MAX_POOL_SATURATION: float = 0.9
+    KAFKA_FLOW_RESUME_RATIO: float = 0.5
+    KAFKA_FLOW_CHECK_INTERVAL_MS: int = 200
+    # Outbox: релей читает события пачками и удаляет отправленные.
+    # Релеев может быть несколько, строки разбираются через SKIP LOCKED
+    KAFKA_OUTBOX_RELAY_ENABLED: bool = True
+    KAFKA_OUTBOX_BATCH_SIZE: int = 500
+    KAFKA_OUTBOX_POLL_INTERVAL_MS: int = 200
 
     @property
     def KAFKA_URL(self):
@@ -0,0 +1,12 @@
+from app.configs.base import BaseConfig
+
+
+class LogsConfig(BaseConfig):
+    LOG_LEVEL: str = "INFO"
+    # json — одна запись в строку для сборщика логов, text — для локальной разработки
+    LOG_FORMAT: str = "json"
+    # Записи уходят в очередь и пишутся в поток отдельным потоком; при переполнении отбрасываются
+    LOG_QUEUE_SIZE: int = 10000
+    # Для записей с sample_key: доля пропускаемых записей и не больше RATE_LIMIT в секунду на ключ
+    LOG_SAMPLE_RATE: float = 1.0
+    LOG_RATE_LIMIT_PER_S: float = 10
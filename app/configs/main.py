@@ -1,6 +1,9 @@
+from app.configs.chats import ChatsConfig
 from app.configs.kafka import KafkaConfig
+from app.configs.logs import LogsConfig
 from app.configs.postgres import PostgresConfig
 from app.configs.secret import SecretsConfig
+from app.configs.websocket import WebSocketConfig
 
 
 class AppSettings:
@@ -8,6 +11,9 @@ class AppSettings:
         self.postgres = PostgresConfig()
         self.secret = SecretsConfig()
         self.kafka = KafkaConfig()
+        self.websocket = WebSocketConfig()
+        self.chats = ChatsConfig()
+        self.logs = LogsConfig()
 
 
 settings = AppSettings()
@@ -8,6 +8,17 @@ class PostgresConfig(BaseConfig):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     TEST_POSTGRES_DB: str
+    # Пул соединений на процесс: POOL_SIZE постоянных и до MAX_OVERFLOW временных
+    POSTGRES_POOL_SIZE: int = 10
+    POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_POOL_TIMEOUT: float = 30
+    POSTGRES_POOL_RECYCLE: int = 1800
+    POSTGRES_POOL_PRE_PING: bool = True
+    POSTGRES_STATEMENT_CACHE_SIZE: int = 100
+    # Реплики для чтения через запятую: host или host:port. Пусто — всё читается с primary
+    POSTGRES_REPLICA_HOSTS: str = ""
+    # Сколько секунд после записи читать затронутые чаты и пользователей с primary
+    POSTGRES_READ_YOUR_WRITES_S: float = 2
 
     @property
     def DB_URL(self) -> str:
@@ -22,3 +33,12 @@ class PostgresConfig(BaseConfig):
             self.POSTGRES_HOST = "db"
         return (f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@"
                 f"{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.TEST_POSTGRES_DB}")
+
+    @property
+    def REPLICA_URLS(self) -> list[str]:
+        urls = []
+        for replica in filter(None, (host.strip() for host in self.POSTGRES_REPLICA_HOSTS.split(","))):
+            host, _, port = replica.partition(":")
+            urls.append(f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@"
+                        f"{host}:{port or self.POSTGRES_PORT}/{self.POSTGRES_DB}")
+        return urls
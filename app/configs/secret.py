@@ -4,3 +4,6 @@ from app.configs.base import BaseConfig
 class SecretsConfig(BaseConfig):
     JWT_SECRET: str
     ALGORITHM: str
+    # Кэш проверенных токенов; запись живёт не дольше exp токена
+    JWT_CACHE_SIZE: int = 50000
+    JWT_CACHE_TTL: float = 300
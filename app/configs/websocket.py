@@ -0,0 +1,10 @@
+from app.configs.base import BaseConfig
+
+
+class WebSocketConfig(BaseConfig):
+    # loopback — доставка только внутри процесса, kafka — между воркерами и нодами
+    WS_BACKPLANE: str = "loopback"
+    # Размер очереди отправки на один сокет; при переполнении клиент отключается
+    WS_SEND_QUEUE_SIZE: int = 256
+    # Сжатие permessage-deflate на уровне uvicorn
+    WS_PER_MESSAGE_DEFLATE: bool = True
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+from typing import Any, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.pool import Pool
+
+from app.brokers.backplane import build_backplane
+from app.brokers.consumer import KafkaConsumer, build_kafka_consumer
+from app.brokers.outbox import OutboxRelay
+from app.brokers.producer import KafkaProducer
+from app.caches.history import RecentMessagesBuffer
+from app.caches.lru import TTLCache
+from app.configs.main import settings
+from app.database import build_read_router, get_async_session_maker, get_pool_saturation, session_pool
+from app.interfaces.brokers import BackplaneInterface, KafkaProducerInterface
+from app.interfaces.repositories import ChatsPostgresRepositoryInterface
+from app.logger import get_logger
+from app.managers.connections import ConnectionManager
+from app.metrics import ContainerCollector, Metrics
+from app.repositories.archive import MessageArchive
+from app.repositories.outbox import OutboxRepository
+from app.repositories.partitions import MessagePartitionsRepository
+from app.repositories.postgres import ChatsPostgresRepository
+from app.services.batching import MessageBatchWriter
+from app.services.chats import ChatsService
+from app.services.retention import MessageRetentionJob
+
+
+class Container:
+    """Зависимости приложения. Создаётся один раз на процесс в lifespan или в воркере.
+
+    Инфраструктурные объекты можно передать явно, так тесты подменяют БД, Kafka и backplane,
+    а бенчмарки — репозиторий чатов.
+    """
+
+    def __init__(
+            self,
+            logger: Optional[logging.Logger] = None,
+            session_maker: Optional[async_sessionmaker[AsyncSession]] = None,
+            kafka_producer: Optional[KafkaProducerInterface] = None,
+            backplane: Optional[BackplaneInterface] = None,
+            chats_pg_repository: Optional[ChatsPostgresRepositoryInterface] = None,
+    ):
+        self.logger = logger or get_logger()
+        self.metrics = Metrics()
+        # реплики подключаются только к боевой БД, подменённая сессия читает и пишет в одну базу
+        self.read_router = build_read_router() if session_maker is None else None
+        self.session_maker = session_maker or get_async_session_maker()
+        self.kafka_producer = kafka_producer or KafkaProducer(settings.kafka.KAFKA_URL, self.logger)
+        self.backplane = backplane or build_backplane(self.kafka_producer, self.logger)
+
+        self.archive = MessageArchive(settings.chats.MESSAGES_ARCHIVE_DIR)
+        self.chats_pg_repository = chats_pg_repository or ChatsPostgresRepository(
+            session_maker=self.session_maker,
+            read_router=self.read_router,
+            archive=self.archive,
+        )
+        self.partitions_repository = MessagePartitionsRepository(session_maker=self.session_maker)
+        self.outbox_repository = OutboxRepository(session_maker=self.session_maker)
+        self.chats_cache = TTLCache(maxsize=settings.chats.CHATS_CACHE_SIZE, ttl=settings.chats.CHATS_CACHE_TTL)
+        self.history = RecentMessagesBuffer(
+            per_chat=settings.chats.HISTORY_BUFFER_SIZE,
+            max_messages=settings.chats.HISTORY_BUFFER_MAX_MESSAGES,
+            max_chats=settings.chats.HISTORY_BUFFER_MAX_CHATS,
+        )
+        self.message_writer = (
+            MessageBatchWriter(self.chats_pg_repository, self.logger)
+            if settings.chats.MESSAGES_BATCH_ENABLED else None
+        )
+        self.chats_service = ChatsService(
+            chats_pg_repository=self.chats_pg_repository,
+            logger=self.logger,
+            message_writer=self.message_writer,
+            chats_cache=self.chats_cache,
+        )
+        self.ws_manager = ConnectionManager(
+            chats_service=self.chats_service,
+            backplane=self.backplane,
+            history=self.history,
+            metrics=self.metrics,
+        )
+        self.outbox_relay = OutboxRelay(self.outbox_repository, self.kafka_producer, self.logger)
+        self.retention_job = MessageRetentionJob(self.partitions_repository, self.archive, self.logger)
+        self.kafka_consumer: Optional[KafkaConsumer] = None
+        self.consumer_task: Optional[asyncio.Task] = None
+        self.metrics.register(ContainerCollector(self))
+
+        # какие фоновые задачи запускать в этом процессе
+        self.run_consumer = settings.kafka.KAFKA_CONSUMER_IN_WEB
+        self.run_outbox_relay = settings.kafka.KAFKA_OUTBOX_RELAY_ENABLED
+        # обслуживание секций — только в python -m app.worker
+        self.run_retention = False
+        # в python -m app.worker сокетов нет
+        self.serves_websockets = True
+        self.ready = False
+
+    async def start(self, **consumer_options: Any) -> None:
+        """consumer_options переопределяют настройки пачек и пула воркеров консьюмера."""
+        await self.kafka_producer.start()
+        if self.message_writer:
+            await self.message_writer.start()
+        await self.backplane.start()
+        if self.run_outbox_relay:
+            await self.outbox_relay.start()
+        if self.run_consumer:
+            self.kafka_consumer = build_kafka_consumer(
+                chats_service=self.chats_service,
+                ws_manager=self.ws_manager,
+                producer=self.kafka_producer,
+                message_writer=self.message_writer,
+                logger=self.logger,
+                serves_websockets=self.serves_websockets,
+                pool_saturation=lambda: get_pool_saturation(session_pool(self.session_maker)),
+                **consumer_options,
+            )
+            await self.kafka_consumer.start()
+            await self.kafka_consumer.subscribe(["likes", "matches"])
+            self.consumer_task = asyncio.create_task(self.kafka_consumer.run())
+        if self.run_retention:
+            await self.retention_job.start()
+        await self.warm_up()
+        self.ready = True
+        self.logger.info("Container started.")
+
+    def db_pools(self) -> dict[str, Pool]:
+        """Пулы, через которые ходит этот контейнер: primary и реплики роутера чтения."""
+        pools = {"primary": session_pool(self.session_maker)}
+        if self.read_router:
+            pools.update(
+                (f"replica_{index}", session_pool(replica)) for index, replica in enumerate(self.read_router.replicas)
+            )
+        return pools
+
+    async def warm_up(self) -> None:
+        """Открываем соединения пулов primary и реплик заранее, чтобы первые запросы не платили за подключение."""
+        session_makers = [self.session_maker, *(self.read_router.replicas if self.read_router else [])]
+        pings = []
+        for session_maker in session_makers:
+            pool = session_pool(session_maker)
+            connections = pool.size() if hasattr(pool, "size") else 1
+            pings.extend(self._ping_database(session_maker) for _ in range(connections))
+        await asyncio.gather(*pings)
+
+    async def stop(self) -> None:
+        self.ready = False
+        if self.run_retention:
+            await self.retention_job.stop()
+        if self.consumer_task:
+            self.consumer_task.cancel()
+            await asyncio.gather(self.consumer_task, return_exceptions=True)
+        if self.kafka_consumer:
+            await self.kafka_consumer.stop()
+        if self.run_outbox_relay:
+            await self.outbox_relay.stop()
+        await self.backplane.stop()
+        if self.message_writer:
+            await self.message_writer.stop()
+        await self.kafka_producer.stop()
+        self.logger.info("Container stopped.")
+
+    @staticmethod
+    async def _ping_database(session_maker: async_sessionmaker[AsyncSession]) -> None:
+        async with session_maker() as session:
+            await session.execute(text("SELECT 1"))
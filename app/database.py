@@ -1,17 +1,168 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import itertools
+import time
+from typing import Any, Hashable, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
 
+from app.caches.lru import MISSING, TTLCache
 from app.configs.main import settings
 
 DB_URL = settings.postgres.DB_URL
 
-engine = create_async_engine(DB_URL)
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+class PoolMetrics:
+    __slots__ = ("checkouts", "wait_seconds_total", "wait_seconds_max", "timeouts")
+
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Пул, который замеряет время выдачи соединения: ожидание свободного,
+    открытие нового в overflow и pre-ping."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.checkouts += 1
+            self.metrics.wait_seconds_total += elapsed
+            self.metrics.wait_seconds_max = max(self.metrics.wait_seconds_max, elapsed)
+
+    def recreate(self) -> "InstrumentedAsyncPool":
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def build_engine(url: str) -> AsyncEngine:
+    config = settings.postgres
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=config.POSTGRES_POOL_SIZE,
+        max_overflow=config.POSTGRES_MAX_OVERFLOW,
+        pool_timeout=config.POSTGRES_POOL_TIMEOUT,
+        pool_recycle=config.POSTGRES_POOL_RECYCLE,
+        pool_pre_ping=config.POSTGRES_POOL_PRE_PING,
+        connect_args={
+            # кэш подготовленных запросов SQLAlchemy и asyncpg; 0 для pgbouncer в режиме transaction
+            "prepared_statement_cache_size": config.POSTGRES_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": config.POSTGRES_STATEMENT_CACHE_SIZE,
+        },
+    )
+
+
+def build_session_maker(bind: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(bind, expire_on_commit=False, class_=AsyncSession)
+
+
+engine = build_engine(DB_URL)
+async_session_maker = build_session_maker(engine)
+replica_engines = [build_engine(url) for url in settings.postgres.REPLICA_URLS]
 
 
 class Base(DeclarativeBase):
     pass
 
 
+class ReadRouter:
+    """Выбирает сессию для чтения: реплики по кругу, primary — если по ключу
+    недавно писали и реплика может ещё не догнать.
+
+    Окно read-your-writes учитывается в пределах процесса.
+    """
+
+    def __init__(
+            self,
+            primary: async_sessionmaker[AsyncSession],
+            replicas: list[async_sessionmaker[AsyncSession]],
+            read_your_writes_s: float,
+            maxsize: int = 100000,
+    ):
+        self.primary = primary
+        self.replicas = replicas
+        self.recent_writes = TTLCache(maxsize=maxsize, ttl=read_your_writes_s)
+        self.primary_reads = 0
+        self.replica_reads = 0
+        self._next_replica = itertools.cycle(replicas) if replicas else None
+
+    def mark_written(self, *keys: Hashable) -> None:
+        for key in keys:
+            self.recent_writes.set(key, True)
+
+    def reader(self, key: Hashable) -> async_sessionmaker[AsyncSession]:
+        if self._next_replica is None or self.recent_writes.get(key) is not MISSING:
+            self.primary_reads += 1
+            return self.primary
+        self.replica_reads += 1
+        return next(self._next_replica)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "replicas": len(self.replicas),
+            "primary_reads": self.primary_reads,
+            "replica_reads": self.replica_reads,
+            "recent_writes": self.recent_writes.stats()["size"],
+        }
+
+
 def get_async_session_maker() -> AsyncSession:
     return async_session_maker
+
+
+def build_read_router() -> Optional[ReadRouter]:
+    if not replica_engines:
+        return None
+    return ReadRouter(
+        primary=async_session_maker,
+        replicas=[build_session_maker(replica) for replica in replica_engines],
+        read_your_writes_s=settings.postgres.POSTGRES_READ_YOUR_WRITES_S,
+    )
+
+
+def session_pool(session_maker: async_sessionmaker[AsyncSession]) -> Pool:
+    """Пул движка, к которому привязана фабрика сессий."""
+    return session_maker.kw["bind"].pool
+
+
+def get_pool_saturation(pool: Pool) -> float:
+    """Доля занятых соединений пула с учётом overflow. У пулов без размера (NullPool) — 0."""
+    if not hasattr(pool, "size"):
+        return 0.0
+    capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+    return pool.checkedout() / capacity if capacity else 0.0
+
+
+def get_pool_stats(pools: dict[str, Pool]) -> dict[str, dict[str, Any]]:
+    """Состояние пулов по именам: занятость и время ожидания соединения."""
+    stats = {}
+    for name, pool in pools.items():
+        metrics = getattr(pool, "metrics", PoolMetrics())
+        sized = hasattr(pool, "size")
+        stats[name] = {
+            "size": pool.size() if sized else 0,
+            "checked_out": pool.checkedout() if sized else 0,
+            "overflow": pool.overflow() if sized else 0,
+            "saturation": get_pool_saturation(pool),
+            "checkouts": metrics.checkouts,
+            "wait_seconds_total": metrics.wait_seconds_total,
+            "wait_seconds_max": metrics.wait_seconds_max,
+            "timeouts": metrics.timeouts,
+        }
+    return stats
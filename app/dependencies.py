@@ -0,0 +1,19 @@
+from fastapi import Depends
+from starlette.requests import HTTPConnection
+
+from app.container import Container
+from app.interfaces.managers import ConnectionsManagerInterface
+from app.interfaces.services import ChatsServiceInterface
+
+
+def get_container(connection: HTTPConnection) -> Container:
+    """HTTPConnection подходит и для HTTP-запросов, и для WebSocket."""
+    return connection.app.state.container
+
+
+def get_chats_service(container: Container = Depends(get_container)) -> ChatsServiceInterface:
+    return container.chats_service
+
+
+def get_ws_manager(container: Container = Depends(get_container)) -> ConnectionsManagerInterface:
+    return container.ws_manager
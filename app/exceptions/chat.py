@@ -15,3 +15,8 @@ class ChatNotFoundException(NotFoundException):
 class ChatExistsException(CustomHTTPException):
     STATUS_CODE = status.HTTP_409_CONFLICT
     DETAIL = "Chat already exists"
+
+
+class SearchTimeoutException(CustomHTTPException):
+    STATUS_CODE = status.HTTP_503_SERVICE_UNAVAILABLE
+    DETAIL = "Search query took too long, refine the query"
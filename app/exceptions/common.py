@@ -16,3 +16,8 @@ class CustomHTTPException(HTTPException):
 class NotFoundException(CustomHTTPException):
     DETAIL = "Not found"
     STATUS_CODE = status.HTTP_404_NOT_FOUND
+
+
+class InvalidCursorException(CustomHTTPException):
+    STATUS_CODE = status.HTTP_400_BAD_REQUEST
+    DETAIL = "Invalid pagination cursor"
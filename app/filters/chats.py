@@ -0,0 +1,9 @@
+from typing import Optional
+
+from app.filters.base import BaseFilter
+
+
+class InboxFilter(BaseFilter):
+    """Курсор before приоритетнее offset."""
+
+    before: Optional[str] = None
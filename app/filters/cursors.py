@@ -0,0 +1,65 @@
+import base64
+import datetime
+import uuid
+from typing import Optional
+
+from app.exceptions.common import InvalidCursorException
+from app.filters.chats import InboxFilter
+from app.filters.messages import MessagesFilter
+from app.filters.search import SearchFilter
+from app.schemas.chats import InboxChatSchema
+from app.schemas.messages import MessageSchema, MessageSearchHitSchema
+
+
+def encode_cursor(created_at: datetime.datetime, item_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{item_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, item_id = raw.split("|")
+        return datetime.datetime.fromisoformat(created_at), uuid.UUID(item_id)
+    except ValueError:
+        raise InvalidCursorException
+
+
+def next_messages_cursor(messages: list[MessageSchema], filters: MessagesFilter) -> Optional[str]:
+    """Курсор следующей страницы в том же направлении, что и текущий запрос.
+
+    Сообщения всегда отсортированы от новых к старым, поэтому для after
+    продолжаем от самого нового сообщения, иначе — от самого старого.
+    """
+    if len(messages) < filters.limit or not messages:
+        return None
+    edge = messages[0] if filters.after else messages[-1]
+    return encode_cursor(edge.created_at, edge.message_id)
+
+
+def next_inbox_cursor(chats: list[InboxChatSchema], filters: InboxFilter) -> Optional[str]:
+    if len(chats) < filters.limit or not chats:
+        return None
+    edge = chats[-1]
+    return encode_cursor(edge.last_activity_at, edge.chat_id)
+
+
+def encode_search_cursor(rank: float, created_at: datetime.datetime, message_id: uuid.UUID) -> str:
+    encoded_rank = base64.urlsafe_b64encode(repr(rank).encode()).decode().rstrip("=")
+    return encode_cursor(created_at, message_id) + "." + encoded_rank
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, datetime.datetime, uuid.UUID]:
+    """Курсор поиска — позиция (rank, created_at, message_id) последнего результата."""
+    try:
+        position, rank = cursor.split(".")
+        rank = float(base64.urlsafe_b64decode(rank + "=" * (-len(rank) % 4)).decode())
+    except ValueError:
+        raise InvalidCursorException
+    return rank, *decode_cursor(position)
+
+
+def next_search_cursor(last: Optional[MessageSearchHitSchema], count: int, filters: SearchFilter) -> Optional[str]:
+    if last is None or count < filters.limit:
+        return None
+    return encode_search_cursor(last.rank, last.created_at, last.message_id)
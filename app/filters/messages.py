@@ -0,0 +1,10 @@
+from typing import Optional
+
+from app.filters.base import BaseFilter
+
+
+class MessagesFilter(BaseFilter):
+    """Курсоры before/after приоритетнее offset, offset оставлен как запасной вариант."""
+
+    before: Optional[str] = None
+    after: Optional[str] = None
@@ -0,0 +1,15 @@
+import uuid
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.configs.main import settings
+
+
+class SearchFilter(BaseModel):
+    """Поиск по сообщениям своих чатов; chat_id сужает поиск до одного чата."""
+
+    q: str = Field(min_length=1, max_length=256)
+    chat_id: Optional[uuid.UUID] = None
+    limit: int = Field(default=30, ge=1, le=settings.chats.SEARCH_MAX_LIMIT)
+    cursor: Optional[str] = None
@@ -1,10 +1,42 @@
 from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Optional
+
+BackplaneHandler = Callable[[str, dict], Awaitable[None]]
 
 
 class KafkaProducerInterface(ABC):
-    likes_topic: str
-    matches_topic: str
+    chats_topic: str
+    messages_topic: str
+
+    @abstractmethod
+    async def sent_message(self, topic: str, data: dict, key: Optional[str] = None) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def send_batch(self, records: list[tuple[str, Optional[str], dict]]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stats(self) -> dict[str, int]:
+        raise NotImplementedError
+
+
+class BackplaneInterface(ABC):
+    """Шина событий между воркерами: каждый воркер публикует событие один раз
+    и доставляет его только в свои локальные сокеты."""
+
+    @abstractmethod
+    async def start(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def stop(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def subscribe(self, node_id: str, handler: BackplaneHandler) -> None:
+        raise NotImplementedError
 
     @abstractmethod
-    async def sent_message(self, topic: str, data: dict) -> None:
+    async def publish(self, node_id: str, kind: str, data: dict) -> None:
         raise NotImplementedError
@@ -3,16 +3,22 @@ from abc import ABC, abstractmethod
 
 from fastapi.websockets import WebSocket
 
+from app.filters.messages import MessagesFilter
 from app.schemas.chats import ChatSchema
+from app.schemas.messages import MessageSchema
 
 
 class ConnectionsManagerInterface(ABC):
     @abstractmethod
-    async def connect(self, connection_id: uuid.UUID, websocket: WebSocket):
+    async def connect_user(self, user_id: uuid.UUID, websocket: WebSocket):
         pass
 
     @abstractmethod
-    async def disconnect(self, connection_id: uuid.UUID, websocket: WebSocket):
+    async def connect_chat(self, chat_id: uuid.UUID, websocket: WebSocket):
+        pass
+
+    @abstractmethod
+    async def disconnect(self, websocket: WebSocket):
         pass
 
     @abstractmethod
@@ -20,5 +26,17 @@ class ConnectionsManagerInterface(ABC):
         pass
 
     @abstractmethod
-    async def send_chat(self, user_ids: list[uuid.UUID], new_chat: ChatSchema):
+    async def send_chat(self, new_chat: ChatSchema):
+        pass
+
+    @abstractmethod
+    async def get_history(self, chat_id: uuid.UUID, filters: MessagesFilter) -> list[MessageSchema]:
+        pass
+
+    @abstractmethod
+    def pending_frames(self) -> int:
+        pass
+
+    @abstractmethod
+    def stats(self) -> dict[str, int]:
         pass
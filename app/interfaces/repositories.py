@@ -1,10 +1,14 @@
 import uuid
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import AsyncIterator, Awaitable, Callable, Optional
 
 from app.filters.base import BaseFilter
-from app.schemas.chats import ChatCreateSchema, ChatSchema
-from app.schemas.messages import MessageCreateSchema, MessageSchema
+from app.filters.chats import InboxFilter
+from app.filters.messages import MessagesFilter
+from app.filters.search import SearchFilter
+from app.schemas.chats import ChatCreateSchema, ChatSchema, InboxChatSchema
+from app.schemas.messages import MessageCreateSchema, MessageSchema, MessageSearchHitSchema
+from app.schemas.outbox import OutboxEventSchema
 
 
 class ChatsPostgresRepositoryInterface(ABC):
@@ -25,5 +29,35 @@ class ChatsPostgresRepositoryInterface(ABC):
         pass
 
     @abstractmethod
-    async def get_chat_messages(self, chat_id: uuid.UUID, filters: BaseFilter) -> list[MessageSchema]:
+    async def create_messages(self, messages_data: list[MessageCreateSchema]) -> list[MessageSchema]:
+        pass
+
+    @abstractmethod
+    async def create_chats(self, chats_data: list[ChatCreateSchema]) -> list[ChatSchema]:
+        pass
+
+    @abstractmethod
+    async def get_chat_messages(self, chat_id: uuid.UUID, filters: MessagesFilter) -> list[MessageSchema]:
+        pass
+
+    @abstractmethod
+    async def get_inbox(self, user_id: uuid.UUID, filters: InboxFilter) -> list[InboxChatSchema]:
+        pass
+
+    @abstractmethod
+    async def mark_chat_read(self, chat_id: uuid.UUID, user_id: uuid.UUID) -> None:
+        pass
+
+    @abstractmethod
+    def search_messages(self, user_id: uuid.UUID, filters: SearchFilter) -> AsyncIterator[MessageSearchHitSchema]:
+        pass
+
+
+class OutboxRepositoryInterface(ABC):
+    @abstractmethod
+    async def relay_batch(
+            self,
+            limit: int,
+            deliver: Callable[[list[OutboxEventSchema]], Awaitable[None]],
+    ) -> int:
         pass
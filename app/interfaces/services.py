@@ -1,9 +1,13 @@
 import uuid
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional
 
 from app.filters.base import BaseFilter
-from app.schemas.chats import ChatCreateSchema, ChatSchema
-from app.schemas.messages import MessageCreateSchema, MessageSchema
+from app.filters.chats import InboxFilter
+from app.filters.messages import MessagesFilter
+from app.filters.search import SearchFilter
+from app.schemas.chats import ChatCreateSchema, ChatSchema, InboxChatSchema
+from app.schemas.messages import MessageCreateSchema, MessageSchema, MessageSearchHitSchema
 
 
 class ChatsServiceInterface(ABC):
@@ -12,7 +16,11 @@ class ChatsServiceInterface(ABC):
         pass
 
     @abstractmethod
-    async def get_chat_by_id(self, chat_id: uuid.UUID) -> ChatSchema:
+    async def get_chat_by_id(self, chat_id: uuid.UUID) -> Optional[ChatSchema]:
+        pass
+
+    @abstractmethod
+    def invalidate_chat(self, chat_id: uuid.UUID) -> None:
         pass
 
     @abstractmethod
@@ -20,9 +28,25 @@ class ChatsServiceInterface(ABC):
         pass
 
     @abstractmethod
-    async def get_chat_messages(self, chat_id: uuid.UUID, filters: BaseFilter) -> list[MessageSchema]:
+    async def create_chats(self, chats_data: list[ChatCreateSchema]) -> list[ChatSchema]:
+        pass
+
+    @abstractmethod
+    async def get_chat_messages(self, chat_id: uuid.UUID, filters: MessagesFilter) -> list[MessageSchema]:
         pass
 
     @abstractmethod
     async def create_message(self, message_data: MessageCreateSchema) -> MessageSchema:
         pass
+
+    @abstractmethod
+    async def get_inbox(self, user_id: uuid.UUID, filters: InboxFilter) -> list[InboxChatSchema]:
+        pass
+
+    @abstractmethod
+    async def mark_chat_read(self, chat_id: uuid.UUID, user_id: uuid.UUID) -> None:
+        pass
+
+    @abstractmethod
+    def search_messages(self, user_id: uuid.UUID, filters: SearchFilter) -> AsyncIterator[MessageSearchHitSchema]:
+        pass
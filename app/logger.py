@@ -1,18 +1,134 @@
+import atexit
+import datetime
+import json
 import logging
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
 
+from app.configs.main import settings
 
-def get_logger() -> logging.Logger:
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(levelname)s:     %(message)s %(asctime)s",
-        handlers=[
-            logging.StreamHandler(),
-        ],
-    )
+# Атрибуты LogRecord, которые не нужно переносить в JSON как extra-поля
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "sample_key"}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-запись на строку. Поля из extra попадают в запись как есть."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Прореживает частые записи, помеченные extra={"sample_key": ...}.
+
+    Каждая запись проходит с вероятностью sample_rate, сверх этого действует
+    token bucket на rate_limit записей в секунду для каждого ключа.
+    Число отброшенных записей добавляется в следующую пропущенную как suppressed.
+    """
+
+    def __init__(self, sample_rate: float, rate_limit: float, clock=time.monotonic):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.rate_limit = rate_limit
+        self.clock = clock
+        # ключ -> [токены, время последнего пополнения, отброшено с прошлой записи]
+        self._buckets: dict[str, list] = {}
+        self.suppressed_total = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "sample_key", None)
+        if key is None:
+            return True
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.rate_limit, now, 0]
+        bucket[0] = min(self.rate_limit, bucket[0] + (now - bucket[1]) * self.rate_limit)
+        bucket[1] = now
+        if bucket[0] < 1 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            bucket[2] += 1
+            self.suppressed_total += 1
+            return False
+        bucket[0] -= 1
+        if bucket[2]:
+            record.suppressed = bucket[2]
+            bucket[2] = 0
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Кладёт запись в очередь без блокировки и без форматирования в потоке event loop."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # форматирование (getMessage, traceback) выполняет поток QueueListener
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging() -> None:
+    """Настраиваем корневой логгер один раз на процесс."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    if settings.logs.LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter("%(levelname)s:     %(message)s %(asctime)s"))
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=settings.logs.LOG_QUEUE_SIZE))
+    queue_handler.addFilter(SamplingFilter(settings.logs.LOG_SAMPLE_RATE, settings.logs.LOG_RATE_LIMIT_PER_S))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(settings.logs.LOG_LEVEL)
 
     logging.getLogger('aiokafka').setLevel(logging.WARNING)
     logging.getLogger('brokers').setLevel(logging.WARNING)
     logging.getLogger('asyncio').setLevel(logging.WARNING)
 
+    _queue_handler = queue_handler
+    _listener = QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def get_logging_stats() -> dict[str, int]:
+    """Записи, потерянные на переполненной очереди и отброшенные сэмплированием."""
+    if _queue_handler is None:
+        return {"dropped": 0, "suppressed": 0}
+    suppressed = sum(log_filter.suppressed_total for log_filter in _queue_handler.filters)
+    return {"dropped": _queue_handler.dropped, "suppressed": suppressed}
+
+
+def get_logger() -> logging.Logger:
+    configure_logging()
     logger = logging.getLogger("walk-profile")
     return logger
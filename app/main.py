@@ -1,4 +1,3 @@
-import asyncio
 import os
 import sys
 
@@ -11,31 +10,23 @@ import uvicorn
 from fastapi import FastAPI
 
 from app.api.chats import router as chat_router
-from app.brokers.consumer import get_kafka_consumer
-from app.brokers.producer import get_kafka_producer
-from app.logger import get_logger
+from app.api.health import router as health_router
+from app.api.metrics import router as metrics_router
+from app.configs.main import settings
+from app.container import Container
+from app.metrics import MetricsMiddleware
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    logger = get_logger()
-    kafka_producer = get_kafka_producer()
-    await kafka_producer.start()
-    logger.info("Kafka Producer initialized.")
-
-    kafka_consumer = get_kafka_consumer()
-    await kafka_consumer.start()
-    await kafka_consumer.subscribe(["likes", "matches"])
-    _ = asyncio.create_task(kafka_consumer.process_messages())
-    logger.info("Kafka Consumer initialized.")
+    # тесты кладут в app.state собственный контейнер до старта приложения
+    container = getattr(app.state, "container", None) or Container()
+    app.state.container = container
+    await container.start()
 
     yield
 
-    await kafka_producer.stop()
-    logger.info("Kafka Producer stopped.")
-
-    await kafka_consumer.stop()
-    logger.info("Kafka Consumer stopped.")
+    await container.stop()
 
 
 app = FastAPI(
@@ -43,9 +34,14 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(chat_router)
+app.include_router(health_router)
+app.include_router(metrics_router)
 
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app", reload=True, port=8002,
+        ws_per_message_deflate=settings.websocket.WS_PER_MESSAGE_DEFLATE,
     )
@@ -0,0 +1,133 @@
+import asyncio
+import uuid
+from typing import Optional
+
+from fastapi import status
+from fastapi.websockets import WebSocket
+
+from app.managers.frames import BINARY_SUBPROTOCOL, Frame, decode_binary_message
+
+
+class QueueDepth:
+    """Кадры во всех очередях отправки процесса: счётчик ведут сами соединения,
+    поэтому чтение не обходит сокеты."""
+
+    __slots__ = ("frames",)
+
+    def __init__(self):
+        self.frames = 0
+
+
+class ClientConnection:
+    """Сокет клиента с собственной ограниченной очередью отправки и задачей-писателем.
+
+    Рассылка только кладёт данные в очередь, поэтому медленный клиент
+    не задерживает остальных получателей.
+    """
+
+    __slots__ = ("websocket", "binary", "stream", "key", "queue", "depth", "dropped", "closed", "_writer")
+
+    def __init__(
+            self,
+            websocket: WebSocket,
+            queue_size: int,
+            stream: str,
+            key: uuid.UUID,
+            depth: Optional[QueueDepth] = None,
+    ):
+        self.websocket = websocket
+        # подписка сокета: поток чатов пользователя key или поток сообщений чата key
+        self.stream = stream
+        self.key = key
+        self.binary = BINARY_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+        self.queue: asyncio.Queue[Frame] = asyncio.Queue(maxsize=queue_size)
+        self.depth = depth or QueueDepth()
+        self.dropped = 0
+        self.closed = False
+        self._writer: Optional[asyncio.Task] = None
+
+    async def accept(self) -> None:
+        await self.websocket.accept(subprotocol=BINARY_SUBPROTOCOL if self.binary else None)
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def offer(self, frame: Frame) -> bool:
+        """Неблокирующая постановка в очередь. False — очередь переполнена."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.depth.frames += 1
+        return True
+
+    async def send(self, frame: Frame) -> None:
+        """Постановка в очередь с ожиданием места, для отправки истории при подключении.
+
+        Место ждём, только пока жив писатель: без него очередь не освободится,
+        и кадр отбрасывается как при переполнении.
+        """
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(frame)
+            self.depth.frames += 1
+            return
+        except asyncio.QueueFull:
+            pass
+        writer = self._writer
+        put = asyncio.ensure_future(self.queue.put(frame))
+        try:
+            if writer is not None and not writer.done():
+                await asyncio.wait({put, writer}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if put.done():
+                self.depth.frames += 1
+                if self.closed:
+                    # место освободил close(), кадр уже некому отправить
+                    self._discard_pending()
+            else:
+                put.cancel()
+                self.dropped += 1
+                self.closed = True
+
+    async def receive(self) -> str:
+        if self.binary:
+            return decode_binary_message(await self.websocket.receive_bytes())
+        return await self.websocket.receive_text()
+
+    async def close(self, code: int = status.WS_1000_NORMAL_CLOSURE) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        if self._writer:
+            self._writer.cancel()
+            self._writer = None
+        self._discard_pending()
+        try:
+            await self.websocket.close(code=code)
+        except RuntimeError:
+            # сокет уже закрыт клиентом
+            pass
+
+    async def _write_loop(self) -> None:
+        try:
+            while True:
+                frame = await self.queue.get()
+                self.depth.frames -= 1
+                if self.binary:
+                    await self.websocket.send_bytes(frame.binary)
+                else:
+                    await self.websocket.send_text(frame.text)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.closed = True
+            self._discard_pending()
+
+    def _discard_pending(self) -> None:
+        """Неотправленные кадры закрытого сокета больше не считаются в очереди процесса."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.depth.frames -= 1
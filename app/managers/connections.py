@@ -1,37 +1,91 @@
+import asyncio
+import time
 import uuid
+from typing import Optional
 
+from fastapi import status
 from fastapi.websockets import WebSocket
 
+from app.caches.history import RecentMessagesBuffer
+from app.configs.main import settings
+from app.filters.messages import MessagesFilter
+from app.interfaces.brokers import BackplaneInterface
+from app.interfaces.managers import ConnectionsManagerInterface
 from app.interfaces.services import ChatsServiceInterface
+from app.managers.clients import ClientConnection, QueueDepth
+from app.managers.frames import Frame
+from app.managers.registry import CHAT_STREAM, USER_STREAM, ConnectionRegistry
+from app.metrics import Metrics
 from app.schemas.chats import ChatSchema
-from app.schemas.messages import MessageCreateSchema
-from app.services.chats import get_chats_service
+from app.schemas.messages import MessageCreateSchema, MessageSchema
 
+MESSAGE_EVENT = "message"
+CHAT_EVENT = "chat"
 
-class ConnectionManager:
-    _instance = None
 
-    def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-
-    def __init__(self, chats_service: ChatsServiceInterface):
-        if not hasattr(self, 'active_connections'):
-            self.active_connections: dict[uuid.UUID, list[WebSocket]] = {}
+class ConnectionManager(ConnectionsManagerInterface):
+    def __init__(
+            self,
+            chats_service: ChatsServiceInterface,
+            backplane: BackplaneInterface,
+            history: RecentMessagesBuffer,
+            queue_size: int = settings.websocket.WS_SEND_QUEUE_SIZE,
+            metrics: Optional[Metrics] = None,
+    ):
+        self.registry = ConnectionRegistry()
+        self.node_id = uuid.uuid4().hex
+        self.backplane = backplane
+        self.backplane.subscribe(self.node_id, self._on_backplane_event)
+        self.history = history
+        self.queue_size = queue_size
+        self.queue_depth = QueueDepth()
+        self.dropped_total = 0
+        self.evicted_total = 0
+        # закрытия вытесненных клиентов идут в фоне; ссылки держим, чтобы задачи не собрал GC
+        self._closing: set[asyncio.Task] = set()
         self.chats_service = chats_service
+        self.metrics = metrics
+
+    async def connect_user(self, user_id: uuid.UUID, websocket: WebSocket) -> ClientConnection:
+        """Сокет получает новые чаты пользователя."""
+        return await self._connect(USER_STREAM, user_id, websocket)
+
+    async def connect_chat(self, chat_id: uuid.UUID, websocket: WebSocket) -> ClientConnection:
+        """Сокет получает сообщения чата."""
+        return await self._connect(CHAT_STREAM, chat_id, websocket)
+
+    async def disconnect(self, websocket: WebSocket):
+        connection = self.registry.find(websocket)
+        if connection:
+            self._unregister(connection)
+            await connection.close()
 
-    async def connect(self, connection_id: uuid.UUID, websocket: WebSocket):
-        if connection_id not in self.active_connections:
-            self.active_connections[connection_id] = []
-        self.active_connections[connection_id].append(websocket)
-        await websocket.accept()
+    async def get_history(self, chat_id: uuid.UUID, filters: MessagesFilter) -> list[MessageSchema]:
+        """История чата из буфера последних сообщений, с ленивым прогревом из БД."""
+        messages = self.history.get(chat_id, filters)
+        if messages is not None:
+            return messages
+        if not self.history.can_serve(filters):
+            return await self.chats_service.get_chat_messages(chat_id, filters)
+        self.history.begin_warm(chat_id)
+        recent = await self.chats_service.get_chat_messages(chat_id, MessagesFilter(limit=self.history.per_chat))
+        self.history.warm(chat_id, recent)
+        return recent[filters.offset:filters.offset + filters.limit]
 
-    async def disconnect(self, connection_id: uuid.UUID, websocket: WebSocket):
-        if connection_id in self.active_connections:
-            self.active_connections[connection_id].remove(websocket)
-            if not self.active_connections[connection_id]:
-                del self.active_connections[connection_id]
+    def pending_frames(self) -> int:
+        """Кадры в очередях отправки всех сокетов процесса, O(1)."""
+        return self.queue_depth.frames
+
+    def stats(self) -> dict[str, int]:
+        """Полный снимок для /metrics: обходит все соединения ради самой длинной очереди."""
+        return {
+            "connections": len(self.registry),
+            "connections_by_stream": self.registry.counts(),
+            "queue_depth": self.queue_depth.frames,
+            "queue_depth_max": max((connection.queue.qsize() for connection in self.registry.connections()), default=0),
+            "dropped_total": self.dropped_total,
+            "evicted_total": self.evicted_total,
+        }
 
     async def send_message(self, chat_id: uuid.UUID, user_id: uuid.UUID, message: str):
         message_data = MessageCreateSchema(
@@ -39,24 +93,74 @@ class ConnectionManager:
             user_id=user_id,
             message_content=message,
         )
+        started = time.perf_counter()
         message = await self.chats_service.create_message(message_data)
-        if chat_id in self.active_connections:
-            chat_connections = self.active_connections[chat_id]
-            for connection in chat_connections:
-                await connection.send_text(message.json())
+        if self.metrics:
+            self.metrics.message_ingest.observe(time.perf_counter() - started)
+        await self._deliver_message(message)
+        await self.backplane.publish(self.node_id, MESSAGE_EVENT, message.model_dump(mode="json"))
 
     async def send_chat(self, chat: ChatSchema):
-        active_connections = []
-        chat_users = str(chat.user1_id), str(chat.user2_id)
-        for user in chat_users:
-            if user in self.active_connections:
-                active_connections.extend(self.active_connections[user])
-        for connection in active_connections:
-            await connection.send_text(chat.json())
-
-
-def get_ws_manager() -> ConnectionManager:
-    chats_service = get_chats_service()
-    return ConnectionManager(
-        chats_service=chats_service,
-    )
+        await self._deliver_chat(chat)
+        await self.backplane.publish(self.node_id, CHAT_EVENT, chat.model_dump(mode="json"))
+
+    async def _deliver_message(self, message: MessageSchema):
+        """Доставляем сообщение только в сокеты этого процесса."""
+        started = time.perf_counter()
+        self.history.append(message)
+        connections = self.registry.chat_connections(message.chat_id)
+        if connections:
+            self._broadcast(connections, Frame(message))
+        if self.metrics:
+            self.metrics.broadcast.labels(MESSAGE_EVENT).observe(time.perf_counter() - started)
+
+    async def _deliver_chat(self, chat: ChatSchema):
+        started = time.perf_counter()
+        frame = Frame(chat)
+        for user_id in {chat.user1_id, chat.user2_id}:
+            connections = self.registry.user_connections(user_id)
+            if connections:
+                self._broadcast(connections, frame)
+        if self.metrics:
+            self.metrics.broadcast.labels(CHAT_EVENT).observe(time.perf_counter() - started)
+
+    async def _connect(self, stream: str, key: uuid.UUID, websocket: WebSocket) -> ClientConnection:
+        # ключи индексов — только UUID, иначе строковый id из токена не найдётся при рассылке
+        key = key if isinstance(key, uuid.UUID) else uuid.UUID(str(key))
+        connection = ClientConnection(websocket, self.queue_size, stream, key, self.queue_depth)
+        self.registry.add(connection)
+        await connection.accept()
+        return connection
+
+    def _broadcast(self, connections: set[ClientConnection], frame: Frame):
+        """Кладём кадр в очереди всех сокетов, не дожидаясь отправки."""
+        # вытесняем после обхода, чтобы не копировать множество ради удаления из него
+        slow = [connection for connection in connections if not connection.offer(frame)]
+        for connection in slow:
+            self._evict(connection)
+
+    def _evict(self, connection: ClientConnection):
+        """Отключаем клиента, который не успевает забирать сообщения."""
+        self._unregister(connection)
+        self.evicted_total += 1
+        task = asyncio.create_task(connection.close(code=status.WS_1013_TRY_AGAIN_LATER))
+        self._closing.add(task)
+        task.add_done_callback(self._on_closed)
+
+    def _on_closed(self, task: asyncio.Task):
+        self._closing.discard(task)
+        if not task.cancelled():
+            # ошибка закрытия уже отключённого клиента ничего не меняет, но её нужно забрать из задачи
+            task.exception()
+
+    def _unregister(self, connection: ClientConnection):
+        if self.registry.remove(connection):
+            self.dropped_total += connection.dropped
+
+    async def _on_backplane_event(self, kind: str, data: dict):
+        if kind == MESSAGE_EVENT:
+            await self._deliver_message(MessageSchema.model_validate(data))
+        elif kind == CHAT_EVENT:
+            chat = ChatSchema.model_validate(data)
+            self.chats_service.invalidate_chat(chat.chat_id)
+            await self._deliver_chat(chat)
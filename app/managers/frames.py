@@ -0,0 +1,52 @@
+import datetime
+import uuid
+from typing import Any, Optional
+
+import msgpack
+from pydantic import BaseModel
+
+# Бинарный подпротокол: MessagePack, UUID — 16 сырых байт, время — миллисекунды от эпохи
+BINARY_SUBPROTOCOL = "walk.msgpack.v1"
+
+
+def _to_binary_value(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return value.bytes
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return int(value.timestamp() * 1000)
+    return value
+
+
+class Frame:
+    """Событие для рассылки. Кодируется не более одного раза на каждый протокол,
+    одни и те же байты уходят всем получателям."""
+
+    __slots__ = ("payload", "_text", "_binary")
+
+    def __init__(self, payload: BaseModel):
+        self.payload = payload
+        self._text: Optional[str] = None
+        self._binary: Optional[bytes] = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.payload.model_dump_json()
+        return self._text
+
+    @property
+    def binary(self) -> bytes:
+        if self._binary is None:
+            data = {key: _to_binary_value(value) for key, value in self.payload}
+            self._binary = msgpack.packb(data, use_bin_type=True)
+        return self._binary
+
+
+def decode_binary_message(data: bytes) -> str:
+    """Входящее сообщение бинарного клиента — строка в MessagePack."""
+    message = msgpack.unpackb(data, raw=False)
+    if not isinstance(message, str):
+        raise ValueError("Binary message must be a MessagePack string")
+    return message
@@ -0,0 +1,81 @@
+import sys
+import uuid
+from typing import Iterator, Optional
+
+from fastapi.websockets import WebSocket
+
+from app.managers.clients import ClientConnection
+
+USER_STREAM = "user"
+CHAT_STREAM = "chat"
+
+EMPTY: frozenset[ClientConnection] = frozenset()
+
+
+class ConnectionRegistry:
+    """Открытые сокеты процесса с раздельными индексами.
+
+    Пользователь → сокеты его потока чатов, чат → сокеты потока сообщений,
+    сокет → запись соединения. Запись сама знает свою подписку, поэтому
+    удаление — O(1) без поиска по спискам.
+    """
+
+    def __init__(self):
+        self._by_user: dict[uuid.UUID, set[ClientConnection]] = {}
+        self._by_chat: dict[uuid.UUID, set[ClientConnection]] = {}
+        self._by_socket: dict[WebSocket, ClientConnection] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_socket)
+
+    def add(self, connection: ClientConnection) -> None:
+        self._index(connection.stream).setdefault(connection.key, set()).add(connection)
+        self._by_socket[connection.websocket] = connection
+
+    def remove(self, connection: ClientConnection) -> bool:
+        """False — соединение уже удалено, например вытеснено во время рассылки."""
+        if self._by_socket.get(connection.websocket) is not connection:
+            return False
+        del self._by_socket[connection.websocket]
+        index = self._index(connection.stream)
+        connections = index[connection.key]
+        connections.discard(connection)
+        if not connections:
+            del index[connection.key]
+        return True
+
+    def find(self, websocket: WebSocket) -> Optional[ClientConnection]:
+        return self._by_socket.get(websocket)
+
+    def user_connections(self, user_id: uuid.UUID) -> set[ClientConnection]:
+        return self._by_user.get(user_id, EMPTY)
+
+    def chat_connections(self, chat_id: uuid.UUID) -> set[ClientConnection]:
+        return self._by_chat.get(chat_id, EMPTY)
+
+    def connections(self) -> Iterator[ClientConnection]:
+        return iter(self._by_socket.values())
+
+    def counts(self) -> dict[str, int]:
+        return {
+            USER_STREAM: sum(map(len, self._by_user.values())),
+            CHAT_STREAM: sum(map(len, self._by_chat.values())),
+        }
+
+    def memory_footprint(self) -> dict[str, int]:
+        """Оценка памяти индексов и записей соединений в байтах.
+
+        Очереди отправки и сами сокеты не учитываются: их размер зависит от нагрузки, а не от реестра.
+        """
+        index_bytes = sum(map(sys.getsizeof, (self._by_user, self._by_chat, self._by_socket)))
+        index_bytes += sum(map(sys.getsizeof, self._by_user.values()))
+        index_bytes += sum(map(sys.getsizeof, self._by_chat.values()))
+        record_bytes = sum(map(sys.getsizeof, self._by_socket.values()))
+        return {
+            "index_bytes": index_bytes,
+            "record_bytes": record_bytes,
+            "bytes_per_connection": (index_bytes + record_bytes) // len(self) if len(self) else 0,
+        }
+
+    def _index(self, stream: str) -> dict[uuid.UUID, set[ClientConnection]]:
+        return self._by_user if stream == USER_STREAM else self._by_chat
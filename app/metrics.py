@@ -0,0 +1,227 @@
+import time
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from prometheus_client import CollectorRegistry, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.database import get_pool_stats
+from app.logger import get_logging_stats
+from app.utils import verified_tokens_cache
+
+if TYPE_CHECKING:
+    from app.container import Container
+
+NAMESPACE = "walk_chat"
+# Ожидания REST-запросов — единицы и десятки миллисекунд
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+# Раскладка кадра по очередям сокетов не ждёт сети и занимает микросекунды
+BROADCAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+
+
+class Metrics:
+    """Метрики процесса в формате Prometheus.
+
+    На горячих путях считаются только гистограммы времени. Счётчики и очереди
+    компонентов читаются из их stats() в момент запроса /metrics.
+    """
+
+    def __init__(self):
+        self.registry = CollectorRegistry()
+        self.http_latency = Histogram(
+            "http_request_duration_seconds",
+            "Время обработки HTTP-запроса по шаблону маршрута и статусу ответа.",
+            ["method", "route", "status"],
+            namespace=NAMESPACE,
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+        self.message_ingest = Histogram(
+            "message_ingest_seconds",
+            "Время от приёма сообщения из сокета до его сохранения в БД.",
+            namespace=NAMESPACE,
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+        self.broadcast = Histogram(
+            "broadcast_seconds",
+            "Время раскладки события по очередям сокетов процесса.",
+            ["event"],
+            namespace=NAMESPACE,
+            buckets=BROADCAST_BUCKETS,
+            registry=self.registry,
+        )
+
+    def register(self, collector: Collector) -> None:
+        self.registry.register(collector)
+
+    def render(self) -> bytes:
+        return generate_latest(self.registry)
+
+
+class ContainerCollector(Collector):
+    """Снимает stats() компонентов контейнера при каждом опросе."""
+
+    def __init__(self, container: "Container"):
+        self.container = container
+
+    def describe(self) -> list[Metric]:
+        # набор метрик зависит от того, какие задачи запущены в процессе
+        return []
+
+    def collect(self) -> Iterator[Metric]:
+        yield from self._connections()
+        yield from self._database()
+        yield from self._consumer()
+        yield from self._producer()
+        yield from self._caches()
+        yield from self._logging()
+
+    def _connections(self) -> Iterator[Metric]:
+        stats = self.container.ws_manager.stats()
+        connections = _gauge("ws_connections", "Открытые WebSocket-соединения.", ["stream"])
+        for stream, count in stats["connections_by_stream"].items():
+            connections.add_metric([stream], count)
+        yield connections
+        yield _gauge("ws_send_queue_depth", "Кадры в очередях отправки всех сокетов.", value=stats["queue_depth"])
+        yield _gauge("ws_send_queue_depth_max", "Самая длинная очередь отправки.", value=stats["queue_depth_max"])
+        yield _counter("ws_dropped_frames", "Кадры, не поместившиеся в очередь сокета.", value=stats["dropped_total"])
+        yield _counter("ws_evicted_connections", "Отключённые медленные клиенты.", value=stats["evicted_total"])
+        footprint = self.container.ws_manager.registry.memory_footprint()
+        registry = _gauge("ws_registry_bytes", "Память реестра сокетов: индексы и записи соединений.", ["part"])
+        registry.add_metric(["index"], footprint["index_bytes"])
+        registry.add_metric(["records"], footprint["record_bytes"])
+        yield registry
+
+    def _database(self) -> Iterator[Metric]:
+        pools = get_pool_stats(self.container.db_pools())
+        families = {
+            "size": _gauge("db_pool_size", "Постоянные соединения пула.", ["pool"]),
+            "checked_out": _gauge("db_pool_checked_out", "Выданные соединения пула.", ["pool"]),
+            "overflow": _gauge("db_pool_overflow", "Соединения сверх размера пула.", ["pool"]),
+            "saturation": _gauge("db_pool_saturation", "Доля занятых соединений с учётом overflow.", ["pool"]),
+            "checkouts": _counter("db_pool_checkouts", "Выдачи соединений из пула.", ["pool"]),
+            "wait_seconds_total": _counter(
+                "db_pool_checkout_wait_seconds", "Суммарное ожидание соединения из пула.", ["pool"],
+            ),
+            "wait_seconds_max": _gauge(
+                "db_pool_checkout_wait_max_seconds", "Самое долгое ожидание соединения.", ["pool"],
+            ),
+            "timeouts": _counter("db_pool_timeouts", "Ожидания соединения, закончившиеся таймаутом.", ["pool"]),
+        }
+        for pool, stats in pools.items():
+            for key, family in families.items():
+                family.add_metric([pool], stats[key])
+        yield from families.values()
+        if self.container.read_router:
+            reads = _counter("db_reads", "Чтения по типу узла.", ["target"])
+            stats = self.container.read_router.stats()
+            reads.add_metric(["primary"], stats["primary_reads"])
+            reads.add_metric(["replica"], stats["replica_reads"])
+            yield reads
+
+    def _consumer(self) -> Iterator[Metric]:
+        consumer = self.container.kafka_consumer
+        if consumer is None:
+            return
+        stats = consumer.stats()
+        lag = _gauge("kafka_consumer_lag", "Отставание консьюмера по партициям.", ["topic", "partition"])
+        for key, value in stats["lag"].items():
+            topic, partition = key.rsplit(":", 1)
+            lag.add_metric([topic, partition], value)
+        yield lag
+        outcomes = _counter("kafka_consumer_records", "Обработанные записи по исходу.", ["outcome"])
+        for outcome, value in stats["outcomes"].items():
+            outcomes.add_metric([outcome], value)
+        yield outcomes
+        yield _gauge("kafka_consumer_paused", "Консьюмер приостановлен из-за нагрузки.", value=int(stats["paused"]))
+        yield _counter("kafka_consumer_pauses", "Приостановки консьюмера из-за нагрузки.", value=stats["pauses_total"])
+        yield _counter("kafka_consumer_resumes", "Возобновления чтения после паузы.", value=stats["resumes_total"])
+        workers = _gauge("kafka_consumer_worker_lag", "Записи в очереди воркера консьюмера.", ["worker"])
+        busy = _counter("kafka_consumer_worker_busy_seconds", "Время обработки пачек воркером.", ["worker"])
+        for worker in stats["workers"]:
+            workers.add_metric([str(worker["worker"])], worker["lag"])
+            busy.add_metric([str(worker["worker"])], worker["busy_seconds"])
+        yield workers
+        yield busy
+
+    def _producer(self) -> Iterator[Metric]:
+        stats = self.container.kafka_producer.stats()
+        records = _counter("kafka_producer_records", "Записи продюсера по исходу.", ["outcome"])
+        for outcome, value in stats.items():
+            records.add_metric([outcome], value)
+        yield records
+        if self.container.run_outbox_relay:
+            relay = self.container.outbox_relay.stats()
+            yield _counter("outbox_relayed", "События outbox, отправленные в Kafka.", value=relay["relayed"])
+            yield _counter("outbox_failures", "Неудачные попытки отправки outbox.", value=relay["failures"])
+
+    def _caches(self) -> Iterator[Metric]:
+        caches = {
+            "chats": self.container.chats_cache.stats(),
+            "history": self.container.history.stats(),
+            # проверенные JWT кэшируются на уровне модуля, а не в контейнере
+            "jwt": verified_tokens_cache.stats(),
+        }
+        hits = _counter("cache_hits", "Попадания в кэш.", ["cache"])
+        misses = _counter("cache_misses", "Промахи кэша.", ["cache"])
+        for cache, stats in caches.items():
+            hits.add_metric([cache], stats["hits"])
+            misses.add_metric([cache], stats["misses"])
+        yield hits
+        yield misses
+
+    def _logging(self) -> Iterator[Metric]:
+        stats = get_logging_stats()
+        yield _counter("log_records_dropped", "Записи лога, не поместившиеся в очередь.", value=stats["dropped"])
+        yield _counter("log_records_sampled_out", "Записи лога, отброшенные сэмплированием.", value=stats["suppressed"])
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: время HTTP-запросов по шаблону маршрута, без BaseHTTPMiddleware."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        container = getattr(scope["app"].state, "container", None) if scope["type"] == "http" else None
+        if container is None:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # роутер кладёт найденный маршрут в scope; без шаблона каждый chat_id дал бы свой ряд
+            route = scope.get("route")
+            container.metrics.http_latency.labels(
+                scope["method"], route.path if route else "unmatched", str(status_code),
+            ).observe(time.perf_counter() - started)
+
+
+def _gauge(
+        name: str,
+        documentation: str,
+        labels: Optional[list[str]] = None,
+        value: Optional[float] = None,
+) -> GaugeMetricFamily:
+    return GaugeMetricFamily(f"{NAMESPACE}_{name}", documentation, value=value, labels=labels)
+
+
+def _counter(
+        name: str,
+        documentation: str,
+        labels: Optional[list[str]] = None,
+        value: Optional[float] = None,
+) -> CounterMetricFamily:
+    return CounterMetricFamily(f"{NAMESPACE}_{name}", documentation, value=value, labels=labels)
@@ -7,6 +7,8 @@ from app.configs.main import settings
 from app.database import Base
 from app.models.chats import Chats
 from app.models.messages import Messages
+from app.models.outbox import OutboxEvents
+from app.models.read_markers import ChatReadMarkers
 
 config = context.config
 config.set_main_option("sqlalchemy.url", f"{settings.postgres.DB_URL}?async_fallback=True")
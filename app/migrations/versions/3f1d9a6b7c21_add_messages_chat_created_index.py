@@ -0,0 +1,29 @@
+"""add messages (chat_id, created_at, message_id) index
+
+Revision ID: 3f1d9a6b7c21
+Revises: c52b2f40a06f
+Create Date: 2026-10-18 10:12:41.502113
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1d9a6b7c21'
+down_revision: Union[str, None] = 'c52b2f40a06f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_messages_chat_id_created_at',
+        'messages',
+        ['chat_id', 'created_at', 'message_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_chat_id_created_at', table_name='messages')
@@ -0,0 +1,62 @@
+"""add inbox columns to chats, chat_read_markers table
+
+Revision ID: 8b4e2c0d5a17
+Revises: 3f1d9a6b7c21
+Create Date: 2026-10-18 11:02:09.118734
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8b4e2c0d5a17'
+down_revision: Union[str, None] = '3f1d9a6b7c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('chats', sa.Column('last_message_id', sa.Uuid(), nullable=True))
+    op.add_column('chats', sa.Column('last_message_at', sa.TIMESTAMP(), nullable=True))
+    op.add_column(
+        'chats',
+        sa.Column('last_activity_at', sa.TIMESTAMP(), server_default=sa.text('NOW()'), nullable=False),
+    )
+    # Заполняем указатель на последнее сообщение для существующих чатов
+    op.execute("""
+        UPDATE chats
+        SET last_message_id = last_message.message_id,
+            last_message_at = last_message.created_at
+        FROM (
+            SELECT DISTINCT ON (chat_id) chat_id, message_id, created_at
+            FROM messages
+            ORDER BY chat_id, created_at DESC, message_id DESC
+        ) AS last_message
+        WHERE chats.chat_id = last_message.chat_id
+    """)
+    op.execute("UPDATE chats SET last_activity_at = COALESCE(last_message_at, created_at)")
+    op.create_index(
+        'ix_chats_user1_id_last_activity_at', 'chats', ['user1_id', 'last_activity_at', 'chat_id'],
+    )
+    op.create_index(
+        'ix_chats_user2_id_last_activity_at', 'chats', ['user2_id', 'last_activity_at', 'chat_id'],
+    )
+    op.create_table('chat_read_markers',
+    sa.Column('chat_id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('last_read_at', sa.TIMESTAMP(), server_default=sa.text('NOW()'), nullable=False),
+    sa.Column('unread_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.ForeignKeyConstraint(['chat_id'], ['chats.chat_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('chat_id', 'user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('chat_read_markers')
+    op.drop_index('ix_chats_user2_id_last_activity_at', table_name='chats')
+    op.drop_index('ix_chats_user1_id_last_activity_at', table_name='chats')
+    op.drop_column('chats', 'last_activity_at')
+    op.drop_column('chats', 'last_message_at')
+    op.drop_column('chats', 'last_message_id')
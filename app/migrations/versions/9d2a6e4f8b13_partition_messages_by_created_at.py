@@ -0,0 +1,86 @@
+"""partition messages by created_at
+
+Revision ID: 9d2a6e4f8b13
+Revises: 5c7e1f3a9d42
+Create Date: 2026-10-18 12:21:07.553190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2a6e4f8b13'
+down_revision: Union[str, None] = '5c7e1f3a9d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Секции создаются заранее на столько месяцев вперёд, дальше их поддерживает MessageRetentionJob
+PARTITIONS_AHEAD = 3
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE messages RENAME TO messages_unpartitioned")
+    op.execute("ALTER TABLE messages_unpartitioned RENAME CONSTRAINT messages_pkey TO messages_unpartitioned_pkey")
+    op.execute("ALTER INDEX ix_messages_chat_id_created_at RENAME TO ix_messages_unpartitioned_chat_id_created_at")
+    # Ключ секционирования должен входить в первичный ключ
+    op.execute("""
+        CREATE TABLE messages (
+            message_id UUID NOT NULL,
+            chat_id UUID NOT NULL REFERENCES chats (chat_id) ON DELETE CASCADE,
+            user_id UUID NOT NULL,
+            message_content VARCHAR NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT NOW() NOT NULL,
+            CONSTRAINT messages_pkey PRIMARY KEY (message_id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.create_index('ix_messages_chat_id_created_at', 'messages', ['chat_id', 'created_at', 'message_id'])
+    # Помесячные секции от самого старого сообщения до PARTITIONS_AHEAD месяцев вперёд
+    op.execute(f"""
+        DO $$
+        DECLARE
+            partition_start DATE := date_trunc(
+                'month', COALESCE((SELECT min(created_at) FROM messages_unpartitioned), now())
+            );
+            last_start DATE := date_trunc('month', now()) + interval '{PARTITIONS_AHEAD} months';
+        BEGIN
+            WHILE partition_start <= last_start LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF messages FOR VALUES FROM (%L) TO (%L)',
+                    'messages_p' || to_char(partition_start, 'YYYYMM'),
+                    partition_start,
+                    (partition_start + interval '1 month')::date
+                );
+                partition_start := partition_start + interval '1 month';
+            END LOOP;
+        END $$
+    """)
+    op.execute("CREATE TABLE messages_default PARTITION OF messages DEFAULT")
+    op.execute("""
+        INSERT INTO messages (message_id, chat_id, user_id, message_content, created_at)
+        SELECT message_id, chat_id, user_id, message_content, created_at FROM messages_unpartitioned
+    """)
+    op.execute("DROP TABLE messages_unpartitioned")
+
+
+def downgrade() -> None:
+    # Выгруженные в архив секции в таблицу не возвращаются
+    op.execute("ALTER TABLE messages RENAME TO messages_partitioned")
+    op.execute("ALTER TABLE messages_partitioned RENAME CONSTRAINT messages_pkey TO messages_partitioned_pkey")
+    op.execute("ALTER INDEX ix_messages_chat_id_created_at RENAME TO ix_messages_partitioned_chat_id_created_at")
+    op.execute("""
+        CREATE TABLE messages (
+            message_id UUID NOT NULL,
+            chat_id UUID NOT NULL REFERENCES chats (chat_id) ON DELETE CASCADE,
+            user_id UUID NOT NULL,
+            message_content VARCHAR NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT NOW() NOT NULL,
+            CONSTRAINT messages_pkey PRIMARY KEY (message_id)
+        )
+    """)
+    op.execute("""
+        INSERT INTO messages (message_id, chat_id, user_id, message_content, created_at)
+        SELECT message_id, chat_id, user_id, message_content, created_at FROM messages_partitioned
+    """)
+    op.execute("DROP TABLE messages_partitioned")
+    op.create_index('ix_messages_chat_id_created_at', 'messages', ['chat_id', 'created_at', 'message_id'])
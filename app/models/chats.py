@@ -1,7 +1,8 @@
 import datetime
 import uuid
+from typing import Optional
 
-from sqlalchemy import TIMESTAMP, UniqueConstraint, text
+from sqlalchemy import TIMESTAMP, Index, UniqueConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
@@ -14,9 +15,16 @@ class Chats(Base):
     user1_id: Mapped[uuid.UUID]
     user2_id: Mapped[uuid.UUID]
     created_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, server_default=text("NOW()"))
+    # Денормализованный указатель на последнее сообщение, обновляется при вставке сообщения
+    last_message_id: Mapped[Optional[uuid.UUID]]
+    last_message_at: Mapped[Optional[datetime.datetime]] = mapped_column(TIMESTAMP)
+    last_activity_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, server_default=text("NOW()"))
 
     __table_args__ = (
         # Добавление уникального индекса на пару (user1_id, user2_id)
         UniqueConstraint('user1_id', 'user2_id', name='uq_user_pair'),
-        UniqueConstraint('user2_id', 'user1_id', name='uq_user_pair_reversed')
+        UniqueConstraint('user2_id', 'user1_id', name='uq_user_pair_reversed'),
+        # Индексы под inbox: чаты пользователя, отсортированные по активности
+        Index('ix_chats_user1_id_last_activity_at', 'user1_id', 'last_activity_at', 'chat_id'),
+        Index('ix_chats_user2_id_last_activity_at', 'user2_id', 'last_activity_at', 'chat_id'),
     )
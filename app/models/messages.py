@@ -1,17 +1,50 @@
 import datetime
 import uuid
+from typing import Optional
 
-from sqlalchemy import TIMESTAMP, ForeignKey, text
+from sqlalchemy import DDL, TIMESTAMP, Computed, ForeignKey, Index, event, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
 
+# Конфигурация полнотекстового поиска; russian стеммит и кириллицу, и латиницу
+SEARCH_CONFIG = "russian"
+
 
 class Messages(Base):
+    """Секционирована по created_at помесячно: messages_pYYYYMM плюс messages_default.
+
+    Будущие секции создаёт MessageRetentionJob, старые выгружаются в архив и удаляются.
+    """
+
     __tablename__ = 'messages'
 
+    # Ключ секционирования обязан входить в первичный ключ
     message_id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     chat_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('chats.chat_id', ondelete='CASCADE'))
     user_id: Mapped[uuid.UUID]
     message_content: Mapped[str]
-    created_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, server_default=text("NOW()"))
+    created_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, primary_key=True, server_default=text("NOW()"))
+    # Вычисляется базой; отложенная загрузка, чтобы не тянуть вектор при чтении истории
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{SEARCH_CONFIG}', message_content)", persisted=True),
+        deferred=True,
+    )
+
+    __table_args__ = (
+        # Индекс под keyset-пагинацию истории чата
+        Index('ix_messages_chat_id_created_at', 'chat_id', 'created_at', 'message_id'),
+        Index('ix_messages_search_vector', 'search_vector', postgresql_using='gin'),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+# Без секций вставка в секционированную таблицу невозможна, поэтому create_all
+# (тесты, локальный запуск без миграций) сразу заводит секцию по умолчанию
+event.listen(
+    Messages.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS messages_default PARTITION OF messages DEFAULT"),
+)
@@ -0,0 +1,20 @@
+import datetime
+from typing import Optional
+
+from sqlalchemy import TIMESTAMP, BigInteger, Identity, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class OutboxEvents(Base):
+    """События для Kafka, записанные в одной транзакции с изменениями. Удаляются после отправки."""
+
+    __tablename__ = 'outbox_events'
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    topic: Mapped[str]
+    key: Mapped[Optional[str]]
+    payload: Mapped[dict] = mapped_column(JSONB)
+    created_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, server_default=text("NOW()"))
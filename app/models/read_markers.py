@@ -0,0 +1,18 @@
+import datetime
+import uuid
+
+from sqlalchemy import TIMESTAMP, ForeignKey, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ChatReadMarkers(Base):
+    """Отметка прочтения чата пользователем и счётчик непрочитанных."""
+
+    __tablename__ = 'chat_read_markers'
+
+    chat_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('chats.chat_id', ondelete='CASCADE'), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+    last_read_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, server_default=text("NOW()"))
+    unread_count: Mapped[int] = mapped_column(server_default=text("0"))
@@ -0,0 +1,152 @@
+import asyncio
+import datetime
+import gzip
+import json
+import os
+import uuid
+from typing import Optional
+
+from app.schemas.messages import MessageSchema
+
+
+def month_start(value: datetime.date) -> datetime.date:
+    return datetime.date(value.year, value.month, 1)
+
+
+def next_month(value: datetime.date) -> datetime.date:
+    return datetime.date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+class MessageArchive:
+    """Архив выгруженных помесячных секций messages в локальных файлах.
+
+    messages_YYYYMM.jsonl.gz — по одному gzip-блоку на чат, строки отсортированы
+    по (created_at, message_id). messages_YYYYMM.index.json хранит смещение
+    и длину блока каждого чата, поэтому читается только нужный блок.
+    Индекс пишется последним: месяц без индекса считается не выгруженным.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._months: Optional[list[datetime.date]] = None
+        self._mtime: Optional[int] = None
+        self._indexes: dict[datetime.date, dict[str, list[int]]] = {}
+
+    def months(self) -> list[datetime.date]:
+        """Выгруженные месяцы от новых к старым. Список перечитывается, когда каталог
+        меняется, в том числе если выгрузку сделал другой процесс."""
+        mtime = os.stat(self.directory).st_mtime_ns if os.path.isdir(self.directory) else None
+        if self._months is None or mtime != self._mtime:
+            self._mtime = mtime
+            months = []
+            if mtime is not None:
+                for name in os.listdir(self.directory):
+                    if name.startswith("messages_") and name.endswith(".index.json"):
+                        stamp = name[len("messages_"):-len(".index.json")]
+                        months.append(datetime.date(int(stamp[:4]), int(stamp[4:]), 1))
+            self._months = sorted(months, reverse=True)
+        return self._months
+
+    def boundary(self) -> Optional[datetime.datetime]:
+        """Всё, что старше границы, лежит только в архиве."""
+        months = self.months()
+        if not months:
+            return None
+        return datetime.datetime.combine(next_month(months[0]), datetime.time())
+
+    def begin_month(self, month: datetime.date) -> "ArchiveWriter":
+        os.makedirs(self.directory, exist_ok=True)
+        return ArchiveWriter(self, month)
+
+    async def read_before(
+            self,
+            chat_id: uuid.UUID,
+            position: Optional[tuple[datetime.datetime, uuid.UUID]],
+            limit: int,
+    ) -> list[MessageSchema]:
+        """До limit сообщений старше position, от новых к старым."""
+        return await asyncio.to_thread(self._read_before, chat_id, position, limit)
+
+    async def read_after(
+            self,
+            chat_id: uuid.UUID,
+            position: tuple[datetime.datetime, uuid.UUID],
+            limit: int,
+    ) -> list[MessageSchema]:
+        """До limit сообщений новее position, от старых к новым."""
+        return await asyncio.to_thread(self._read_after, chat_id, position, limit)
+
+    def _read_before(self, chat_id, position, limit) -> list[MessageSchema]:
+        result = []
+        for month in self.months():
+            if position and datetime.datetime.combine(month, datetime.time()) > position[0]:
+                continue
+            messages = self._read_chat(month, chat_id)
+            for message in reversed(messages):
+                if position is None or (message.created_at, message.message_id) < position:
+                    result.append(message)
+                    if len(result) == limit:
+                        return result
+        return result
+
+    def _read_after(self, chat_id, position, limit) -> list[MessageSchema]:
+        result = []
+        for month in reversed(self.months()):
+            if datetime.datetime.combine(next_month(month), datetime.time()) <= position[0]:
+                continue
+            for message in self._read_chat(month, chat_id):
+                if (message.created_at, message.message_id) > position:
+                    result.append(message)
+                    if len(result) == limit:
+                        return result
+        return result
+
+    def _read_chat(self, month: datetime.date, chat_id: uuid.UUID) -> list[MessageSchema]:
+        block = self._index(month).get(str(chat_id))
+        if block is None:
+            return []
+        offset, length = block
+        with open(self._path(month, "jsonl.gz"), "rb") as file:
+            file.seek(offset)
+            lines = gzip.decompress(file.read(length)).splitlines()
+        return [MessageSchema.model_validate_json(line) for line in lines]
+
+    def _index(self, month: datetime.date) -> dict[str, list[int]]:
+        if month not in self._indexes:
+            with open(self._path(month, "index.json")) as file:
+                self._indexes[month] = json.load(file)
+        return self._indexes[month]
+
+    def _path(self, month: datetime.date, suffix: str) -> str:
+        return os.path.join(self.directory, f"messages_{month:%Y%m}.{suffix}")
+
+
+class ArchiveWriter:
+    """Запись месяца в архив. Сообщения должны приходить отсортированными по чату и времени."""
+
+    def __init__(self, archive: MessageArchive, month: datetime.date):
+        self.archive = archive
+        self.month = month
+        self.index: dict[str, list[int]] = {}
+        self.count = 0
+        self._file = open(archive._path(month, "jsonl.gz.tmp"), "wb")
+
+    def write_chat(self, chat_id: uuid.UUID, messages: list[MessageSchema]) -> None:
+        block = gzip.compress("\n".join(message.model_dump_json() for message in messages).encode())
+        self.index[str(chat_id)] = [self._file.tell(), len(block)]
+        self._file.write(block)
+        self.count += len(messages)
+
+    def commit(self) -> None:
+        self._file.close()
+        os.replace(self.archive._path(self.month, "jsonl.gz.tmp"), self.archive._path(self.month, "jsonl.gz"))
+        index_path = self.archive._path(self.month, "index.json")
+        with open(index_path + ".tmp", "w") as file:
+            json.dump(self.index, file)
+        os.replace(index_path + ".tmp", index_path)
+        self.archive._months = None
+        self.archive._indexes.pop(self.month, None)
+
+    def abort(self) -> None:
+        self._file.close()
+        os.remove(self.archive._path(self.month, "jsonl.gz.tmp"))
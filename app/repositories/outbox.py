@@ -0,0 +1,58 @@
+from typing import Awaitable, Callable
+
+from pydantic import BaseModel
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.interfaces.repositories import OutboxRepositoryInterface
+from app.models.outbox import OutboxEvents
+from app.schemas.outbox import OutboxEventSchema
+
+CHAT_CREATED_EVENT = "chat_created"
+MESSAGE_CREATED_EVENT = "message_created"
+
+
+async def add_outbox_events(session: AsyncSession, topic: str, event: str, items: list[BaseModel]) -> None:
+    """Записываем события в outbox в транзакции вызывающего. Ключ — чат,
+    чтобы события одного чата шли в одну партицию по порядку."""
+    if not items:
+        return
+    await session.execute(insert(OutboxEvents).values([
+        {"topic": topic, "key": str(item.chat_id), "payload": {"event": event, "data": item.model_dump(mode="json")}}
+        for item in items
+    ]))
+
+
+class OutboxRepository(OutboxRepositoryInterface):
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession]):
+        self.session_maker = session_maker
+        self.outbox_table = OutboxEvents
+
+    async def relay_batch(
+            self,
+            limit: int,
+            deliver: Callable[[list[OutboxEventSchema]], Awaitable[None]],
+    ) -> int:
+        """Забираем до limit самых старых событий, отдаём в deliver и удаляем их в той же транзакции.
+
+        FOR UPDATE SKIP LOCKED позволяет нескольким релеям разбирать outbox параллельно.
+        Если deliver падает, транзакция откатывается и события останутся для следующей попытки.
+        """
+        query = (
+            select(self.outbox_table)
+            .order_by(self.outbox_table.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        async with self.session_maker() as session:
+            result = await session.execute(query)
+            events = [OutboxEventSchema.model_validate(event) for event in result.scalars()]
+            if not events:
+                return 0
+            await deliver(events)
+            await session.execute(
+                delete(self.outbox_table).where(self.outbox_table.id.in_([event.id for event in events]))
+            )
+            await session.commit()
+        return len(events)
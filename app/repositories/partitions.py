@@ -0,0 +1,100 @@
+import asyncio
+import datetime
+import re
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.messages import Messages
+from app.repositories.archive import ArchiveWriter, next_month
+from app.schemas.messages import MessageSchema
+
+PARTITION_NAME = re.compile(r"^messages_p(\d{4})(\d{2})$")
+# произвольный ключ advisory-блокировки обслуживания секций
+MAINTENANCE_LOCK_ID = 7_352_841
+
+
+def partition_name(month: datetime.date) -> str:
+    return f"messages_p{month:%Y%m}"
+
+
+class MessagePartitionsRepository:
+    """DDL и выгрузка помесячных секций messages."""
+
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession]):
+        self.session_maker = session_maker
+        self.message_table = Messages
+
+    @asynccontextmanager
+    async def maintenance_lock(self) -> AsyncIterator[bool]:
+        """Сессионная advisory-блокировка: обслуживанием занимается один процесс."""
+        async with self.session_maker() as session:
+            acquired = (await session.execute(
+                text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": MAINTENANCE_LOCK_ID},
+            )).scalar_one()
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    await session.execute(
+                        text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": MAINTENANCE_LOCK_ID},
+                    )
+
+    async def list_partitions(self) -> list[datetime.date]:
+        """Месяцы присоединённых помесячных секций, от старых к новым."""
+        query = text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = 'messages'::regclass
+        """)
+        async with self.session_maker() as session:
+            names = (await session.execute(query)).scalars().all()
+        months = []
+        for name in names:
+            match = PARTITION_NAME.match(name)
+            if match:
+                months.append(datetime.date(int(match[1]), int(match[2]), 1))
+        return sorted(months)
+
+    async def create_partition(self, month: datetime.date) -> None:
+        # имена и границы формируются из даты, а не из пользовательского ввода
+        ddl = (
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF messages "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+        )
+        async with self.session_maker() as session:
+            await session.execute(text(ddl))
+            await session.commit()
+
+    async def export_partition(self, month: datetime.date, writer: ArchiveWriter) -> None:
+        """Потоково выгружаем секцию в архив, сообщения одного чата пишутся одним блоком.
+        Фильтр по диапазону секции отсекает остальные секции на этапе планирования."""
+        query = (
+            select(self.message_table)
+            .where(
+                self.message_table.created_at >= month,
+                self.message_table.created_at < next_month(month),
+            )
+            .order_by(self.message_table.chat_id, self.message_table.created_at, self.message_table.message_id)
+            .execution_options(yield_per=1000)
+        )
+        chat_id, messages = None, []
+        async with self.session_maker() as session:
+            async for message in await session.stream_scalars(query):
+                if message.chat_id != chat_id and messages:
+                    await asyncio.to_thread(writer.write_chat, chat_id, messages)
+                    messages = []
+                chat_id = message.chat_id
+                messages.append(MessageSchema.model_validate(message))
+        if messages:
+            await asyncio.to_thread(writer.write_chat, chat_id, messages)
+
+    async def drop_partition(self, month: datetime.date) -> None:
+        name = partition_name(month)
+        async with self.session_maker() as session:
+            await session.execute(text(f"ALTER TABLE messages DETACH PARTITION {name}"))
+            await session.execute(text(f"DROP TABLE {name}"))
+            await session.commit()
@@ -1,25 +1,49 @@
+import datetime
 import uuid
-from typing import Optional
+from typing import AsyncIterator, Hashable, Optional
 
-from sqlalchemy import or_, select
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import TIMESTAMP, Uuid, and_, column, func, or_, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.database import get_async_session_maker
-from app.exceptions.chat import ChatExistsException
+from app.configs.main import settings
+from app.database import ReadRouter
+from app.exceptions.chat import ChatExistsException, SearchTimeoutException
 from app.filters.base import BaseFilter
+from app.filters.chats import InboxFilter
+from app.filters.cursors import decode_cursor, decode_search_cursor
+from app.filters.messages import MessagesFilter
+from app.filters.search import SearchFilter
 from app.interfaces.repositories import ChatsPostgresRepositoryInterface
 from app.models.chats import Chats
-from app.models.messages import Messages
-from app.schemas.chats import ChatCreateSchema, ChatSchema
-from app.schemas.messages import MessageCreateSchema, MessageSchema
+from app.models.messages import SEARCH_CONFIG, Messages
+from app.models.read_markers import ChatReadMarkers
+from app.repositories.archive import MessageArchive
+from app.repositories.outbox import CHAT_CREATED_EVENT, MESSAGE_CREATED_EVENT, add_outbox_events
+from app.schemas.chats import ChatCreateSchema, ChatSchema, InboxChatSchema
+from app.schemas.messages import MessageCreateSchema, MessageSchema, MessageSearchHitSchema
+
+# SQLSTATE query_canceled: сработал statement_timeout
+QUERY_CANCELED = "57014"
+SEARCH_HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=20, MinWords=5, MaxFragments=2"
 
 
 class ChatsPostgresRepository(ChatsPostgresRepositoryInterface):
-    def __init__(self, session_maker: async_sessionmaker[AsyncSession]):
+    def __init__(
+            self,
+            session_maker: async_sessionmaker[AsyncSession],
+            read_router: Optional[ReadRouter] = None,
+            archive: Optional[MessageArchive] = None,
+    ):
         self.session_maker = session_maker
+        self.read_router = read_router
+        self.archive = archive
         self.chat_table = Chats
         self.message_table = Messages
+        # колонки сообщения без вычисляемого search_vector
+        self.message_columns = [Messages.__table__.c[name] for name in MessageSchema.model_fields]
+        self.read_marker_table = ChatReadMarkers
 
     async def get_my_chats(self, user_id: uuid.UUID, filters: BaseFilter) -> list[ChatSchema]:
         query = (
@@ -28,57 +52,312 @@ class ChatsPostgresRepository(ChatsPostgresRepositoryInterface):
             .offset(filters.offset)
             .limit(filters.limit)
         )
-        async with self.session_maker() as session:
+        async with self._reader(user_id)() as session:
             chats_data = await session.execute(query)
         chats = [ChatSchema.model_validate(chat) for chat in chats_data.scalars()]
         return chats
 
     async def get_chat_by_id(self, chat_id: uuid.UUID) -> Optional[ChatSchema]:
         query = select(self.chat_table).where(self.chat_table.chat_id == chat_id)
-        async with self.session_maker() as session:
+        async with self._reader(chat_id)() as session:
             chat_data = await session.execute(query)
         chat = chat_data.scalar_one_or_none()
         return ChatSchema.model_validate(chat) if chat else None
 
     async def create_chat(self, chat_data: ChatCreateSchema) -> ChatSchema:
-        chat = self.chat_table(
-            **chat_data.dict()
+        """Один запрос INSERT ... ON CONFLICT DO NOTHING RETURNING: дубликат пары
+        определяется по пустому результату, без IntegrityError и отката."""
+        query = (
+            insert(self.chat_table)
+            .values(chat_id=uuid.uuid4(), **chat_data.model_dump())
+            .on_conflict_do_nothing()
+            .returning(*self.chat_table.__table__.columns)
         )
         async with self.session_maker() as session:
-            try:
-                session.add(chat)
-                await session.commit()
-            except IntegrityError:
+            chat = (await session.execute(query)).one_or_none()
+            if chat is None:
                 raise ChatExistsException
-            await session.refresh(chat)
-        return ChatSchema.model_validate(chat)
+            chat = ChatSchema.model_validate(chat)
+            await add_outbox_events(session, settings.kafka.KAFKA_CHATS_TOPIC, CHAT_CREATED_EVENT, [chat])
+            await session.commit()
+        self._mark_written(chat.chat_id, chat.user1_id, chat.user2_id)
+        return chat
+
+    async def create_chats(self, chats_data: list[ChatCreateSchema]) -> list[ChatSchema]:
+        """Массовое создание чатов. Уже существующие пары пропускаются, возвращаются только новые чаты."""
+        query = (
+            insert(self.chat_table)
+            .values([{"chat_id": uuid.uuid4(), **chat_data.model_dump()} for chat_data in chats_data])
+            .on_conflict_do_nothing()
+            .returning(*self.chat_table.__table__.columns)
+        )
+        async with self.session_maker() as session:
+            result = await session.execute(query)
+            chats = [ChatSchema.model_validate(chat) for chat in result]
+            await add_outbox_events(session, settings.kafka.KAFKA_CHATS_TOPIC, CHAT_CREATED_EVENT, chats)
+            await session.commit()
+        for chat in chats:
+            self._mark_written(chat.chat_id, chat.user1_id, chat.user2_id)
+        return chats
 
     async def create_message(self, message_data: MessageCreateSchema) -> MessageSchema:
-        message = self.message_table(
-            **message_data.dict()
+        messages = await self.create_messages([message_data])
+        return messages[0]
+
+    async def create_messages(self, messages_data: list[MessageCreateSchema]) -> list[MessageSchema]:
+        """Вставка пачки сообщений одним INSERT ... RETURNING в одной транзакции.
+
+        clock_timestamp() вычисляется построчно, поэтому порядок сообщений
+        внутри пачки сохраняется в created_at.
+        """
+        rows = [
+            {"message_id": uuid.uuid4(), "created_at": func.clock_timestamp(), **message_data.model_dump()}
+            for message_data in messages_data
+        ]
+        query = insert(self.message_table).values(rows).returning(*self.message_columns)
+        async with self.session_maker() as session:
+            await self._lock_chats(session, {message_data.chat_id for message_data in messages_data})
+            result = await session.execute(query)
+            created = {row.message_id: MessageSchema.model_validate(row) for row in result}
+            messages = [created[row["message_id"]] for row in rows]
+            await self._on_messages_created(session, messages)
+            await add_outbox_events(session, settings.kafka.KAFKA_MESSAGES_TOPIC, MESSAGE_CREATED_EVENT, messages)
+            await session.commit()
+        self._mark_written(*{message.chat_id for message in messages})
+        return messages
+
+    async def search_messages(self, user_id: uuid.UUID, filters: SearchFilter) -> AsyncIterator[MessageSearchHitSchema]:
+        """Сообщения из чатов пользователя по убыванию релевантности, keyset по (rank, created_at, message_id).
+
+        Сначала по GIN-индексу выбирается страница идентификаторов, ts_headline
+        считается только для неё. Запрос ограничен statement_timeout.
+        """
+        message, chat = self.message_table, self.chat_table
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, filters.q)
+        rank = func.ts_rank(message.search_vector, ts_query)
+        hits = (
+            select(message.message_id, message.created_at, rank.label("rank"))
+            .join(chat, chat.chat_id == message.chat_id)
+            .where(
+                message.search_vector.op("@@")(ts_query),
+                or_(chat.user1_id == user_id, chat.user2_id == user_id),
+            )
+        )
+        if filters.chat_id:
+            hits = hits.where(message.chat_id == filters.chat_id)
+        if filters.cursor:
+            hits = hits.where(
+                tuple_(rank, message.created_at, message.message_id) < tuple_(*decode_search_cursor(filters.cursor))
+            )
+        hits = (
+            hits.order_by(rank.desc(), message.created_at.desc(), message.message_id.desc())
+            .limit(filters.limit)
+            .subquery()
+        )
+        query = (
+            select(
+                *self.message_columns,
+                hits.c.rank,
+                func.ts_headline(SEARCH_CONFIG, message.message_content, ts_query, SEARCH_HEADLINE_OPTIONS)
+                .label("snippet"),
+            )
+            .join(hits, and_(message.message_id == hits.c.message_id, message.created_at == hits.c.created_at))
+            .order_by(hits.c.rank.desc(), message.created_at.desc(), message.message_id.desc())
+        )
+        async with self._reader(user_id)() as session:
+            try:
+                await session.execute(select(func.set_config(
+                    "statement_timeout", str(settings.chats.SEARCH_STATEMENT_TIMEOUT_MS), True,
+                )))
+                result = await session.stream(query)
+                async for row in result.mappings():
+                    yield MessageSearchHitSchema.model_validate(row)
+            except DBAPIError as e:
+                if getattr(e.orig, "pgcode", None) == QUERY_CANCELED:
+                    raise SearchTimeoutException
+                raise
+
+    def _reader(self, key: Hashable) -> async_sessionmaker[AsyncSession]:
+        """Сессия для чтения: реплика, если она настроена и по ключу не писали в окне read-your-writes."""
+        return self.read_router.reader(key) if self.read_router else self.session_maker
+
+    def _mark_written(self, *keys: Hashable) -> None:
+        if self.read_router:
+            self.read_router.mark_written(*keys)
+
+    async def _lock_chats(self, session: AsyncSession, chat_ids: set[uuid.UUID]) -> None:
+        """Блокируем строки чатов пачки по возрастанию chat_id.
+
+        Пачки разных воркеров пересекаются по чатам; при общем порядке захвата
+        они ждут друг друга, а не блокируют по кругу. FOR NO KEY UPDATE не
+        конфликтует с FOR KEY SHARE, который берёт проверка внешнего ключа.
+        """
+        await session.execute(
+            select(self.chat_table.chat_id)
+            .where(self.chat_table.chat_id.in_(chat_ids))
+            .order_by(self.chat_table.chat_id)
+            .with_for_update(key_share=True)
+        )
+
+    async def _on_messages_created(self, session: AsyncSession, messages: list[MessageSchema]) -> None:
+        """Обновляем указатели на последнее сообщение и отметки прочтения в той же транзакции."""
+        last_messages = {message.chat_id: message for message in messages}
+        last_messages_values = values(
+            column("chat_id", Uuid),
+            column("message_id", Uuid),
+            column("created_at", TIMESTAMP),
+            name="last_messages",
+        ).data([(message.chat_id, message.message_id, message.created_at) for message in last_messages.values()])
+        chat_update = (
+            update(self.chat_table)
+            .where(self.chat_table.chat_id == last_messages_values.c.chat_id)
+            .values(
+                last_message_id=last_messages_values.c.message_id,
+                last_message_at=last_messages_values.c.created_at,
+                last_activity_at=last_messages_values.c.created_at,
+            )
+            .returning(self.chat_table.chat_id, self.chat_table.user1_id, self.chat_table.user2_id)
         )
+        chat_users = {row.chat_id: (row.user1_id, row.user2_id) for row in await session.execute(chat_update)}
+
+        # Прочитанным считается всё до собственного сообщения пользователя,
+        # каждое сообщение собеседника увеличивает счётчик непрочитанных
+        read_markers: dict[tuple[uuid.UUID, uuid.UUID], dict] = {}
+        unread_increments: dict[tuple[uuid.UUID, uuid.UUID], int] = {}
+        for message in messages:
+            if message.chat_id not in chat_users:
+                continue
+            user1_id, user2_id = chat_users[message.chat_id]
+            recipient_key = (message.chat_id, user2_id if user1_id == message.user_id else user1_id)
+            sender_key = (message.chat_id, message.user_id)
+            if recipient_key in read_markers:
+                read_markers[recipient_key]["unread_count"] += 1
+            else:
+                unread_increments[recipient_key] = unread_increments.get(recipient_key, 0) + 1
+            unread_increments.pop(sender_key, None)
+            read_markers[sender_key] = {
+                "chat_id": message.chat_id,
+                "user_id": message.user_id,
+                "last_read_at": message.created_at,
+                "unread_count": 0,
+            }
+
+        marker_conflict = [self.read_marker_table.chat_id, self.read_marker_table.user_id]
+        if unread_increments:
+            increments = insert(self.read_marker_table).values([
+                {"chat_id": chat_id, "user_id": user_id, "unread_count": count}
+                for (chat_id, user_id), count in sorted(unread_increments.items())
+            ])
+            await session.execute(increments.on_conflict_do_update(
+                index_elements=marker_conflict,
+                set_={"unread_count": self.read_marker_table.unread_count + increments.excluded.unread_count},
+            ))
+        if read_markers:
+            # строки отметок тоже захватываются в порядке ключа
+            resets = insert(self.read_marker_table).values([read_markers[key] for key in sorted(read_markers)])
+            await session.execute(resets.on_conflict_do_update(
+                index_elements=marker_conflict,
+                set_={"last_read_at": resets.excluded.last_read_at, "unread_count": resets.excluded.unread_count},
+            ))
+
+    async def _upsert_read_marker(
+            self,
+            session: AsyncSession,
+            chat_id: uuid.UUID,
+            user_id: uuid.UUID,
+            read_at: Optional[datetime.datetime] = None,
+    ) -> None:
+        marker = insert(self.read_marker_table).values(
+            chat_id=chat_id,
+            user_id=user_id,
+            last_read_at=read_at if read_at else func.now(),
+            unread_count=0,
+        )
+        await session.execute(marker.on_conflict_do_update(
+            index_elements=[self.read_marker_table.chat_id, self.read_marker_table.user_id],
+            set_={"last_read_at": marker.excluded.last_read_at, "unread_count": 0},
+        ))
+
+    async def mark_chat_read(self, chat_id: uuid.UUID, user_id: uuid.UUID) -> None:
         async with self.session_maker() as session:
-            session.add(message)
+            await self._upsert_read_marker(session, chat_id, user_id)
             await session.commit()
-            await session.refresh(message)
-        return MessageSchema.model_validate(message)
 
-    async def get_chat_messages(self, chat_id: uuid.UUID, filters: BaseFilter) -> list[MessageSchema]:
+    async def get_inbox(self, user_id: uuid.UUID, filters: InboxFilter) -> list[InboxChatSchema]:
+        """Чаты пользователя с последним сообщением и числом непрочитанных одним запросом."""
+        chat, message, marker = self.chat_table, self.message_table, self.read_marker_table
         query = (
-            select(self.message_table)
-            .where(self.message_table.chat_id == chat_id)
-            .order_by(self.message_table.created_at.desc())
-            .offset(filters.offset)
-            .limit(filters.limit)
+            select(chat, message, marker.unread_count)
+            .outerjoin(message, and_(
+                message.message_id == chat.last_message_id,
+                message.created_at == chat.last_message_at,
+            ))
+            .outerjoin(marker, and_(marker.chat_id == chat.chat_id, marker.user_id == user_id))
+            .where(or_(chat.user1_id == user_id, chat.user2_id == user_id))
+            .order_by(chat.last_activity_at.desc(), chat.chat_id.desc())
         )
+        if filters.before:
+            query = query.where(tuple_(chat.last_activity_at, chat.chat_id) < tuple_(*decode_cursor(filters.before)))
+        else:
+            query = query.offset(filters.offset)
+        query = query.limit(filters.limit)
         async with self.session_maker() as session:
             result = await session.execute(query)
-        messages = [MessageSchema.model_validate(message) for message in result.scalars()]
-        return messages
+        return [
+            InboxChatSchema(
+                **ChatSchema.model_validate(chat_row).model_dump(),
+                last_message=MessageSchema.model_validate(message_row) if message_row else None,
+                last_activity_at=chat_row.last_activity_at,
+                unread_count=unread_count or 0,
+            )
+            for chat_row, message_row, unread_count in result
+        ]
+
+    async def get_chat_messages(self, chat_id: uuid.UUID, filters: MessagesFilter) -> list[MessageSchema]:
+        """Сообщения от новых к старым. По курсору — keyset по (created_at, message_id),
+        без курсора — offset/limit.
 
+        Если страница уходит за границу горячих секций, недостающее дочитывается из архива.
+        """
+        after = decode_cursor(filters.after) if filters.after else None
+        before = decode_cursor(filters.before) if filters.before else None
+        archived_after = []
+        if after and self.archive:
+            boundary = self.archive.boundary()
+            if boundary and after[0] < boundary:
+                archived_after = await self.archive.read_after(chat_id, after, filters.limit)
 
-def get_chats_pg_repository() -> ChatsPostgresRepository:
-    session_maker = get_async_session_maker()
-    return ChatsPostgresRepository(
-        session_maker=session_maker,
-    )
+        position = tuple_(self.message_table.created_at, self.message_table.message_id)
+        query = select(self.message_table).where(self.message_table.chat_id == chat_id)
+        if after:
+            query = (
+                query.where(position > tuple_(*after))
+                .order_by(self.message_table.created_at.asc(), self.message_table.message_id.asc())
+            )
+        elif before:
+            query = (
+                query.where(position < tuple_(*before))
+                .order_by(self.message_table.created_at.desc(), self.message_table.message_id.desc())
+            )
+        else:
+            query = (
+                query.order_by(self.message_table.created_at.desc(), self.message_table.message_id.desc())
+                .offset(filters.offset)
+            )
+        messages = []
+        limit = filters.limit - len(archived_after)
+        if limit > 0:
+            async with self._reader(chat_id)() as session:
+                result = await session.execute(query.limit(limit))
+            messages = [MessageSchema.model_validate(message) for message in result.scalars()]
+
+        if after:
+            messages = archived_after + messages
+            messages.reverse()
+        elif (
+                self.archive and self.archive.boundary() and
+                len(messages) < filters.limit and (before or not filters.offset)
+        ):
+            edge = (messages[-1].created_at, messages[-1].message_id) if messages else before
+            messages += await self.archive.read_before(chat_id, edge, filters.limit - len(messages))
+        return messages
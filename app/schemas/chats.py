@@ -1,8 +1,11 @@
 import datetime
 import uuid
+from typing import Optional
 
 from pydantic import BaseModel
 
+from app.schemas.messages import MessageSchema
+
 
 class ChatCreateSchema(BaseModel):
     user1_id: uuid.UUID
@@ -17,3 +20,9 @@ class ChatSchema(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class InboxChatSchema(ChatSchema):
+    last_message: Optional[MessageSchema] = None
+    last_activity_at: datetime.datetime
+    unread_count: int = 0
@@ -11,6 +11,7 @@ class MessageCreateSchema(BaseModel):
 
 
 class MessageSchema(BaseModel):
+    message_id: uuid.UUID
     chat_id: uuid.UUID
     user_id: uuid.UUID
     message_content: str
@@ -18,3 +19,9 @@ class MessageSchema(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class MessageSearchHitSchema(MessageSchema):
+    rank: float
+    # Фрагмент сообщения, совпадения обёрнуты в <mark></mark>
+    snippet: str
@@ -0,0 +1,13 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class OutboxEventSchema(BaseModel):
+    id: int
+    topic: str
+    key: Optional[str]
+    payload: dict
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from typing import Optional
+
+from app.configs.main import settings
+from app.interfaces.repositories import ChatsPostgresRepositoryInterface
+from app.schemas.messages import MessageCreateSchema, MessageSchema
+
+
+class MessageBatchWriter:
+    """Собирает сообщения, пришедшие в пределах окна, в одну вставку.
+
+    Отправитель получает ответ только после коммита своей пачки.
+    """
+
+    def __init__(
+            self,
+            chats_pg_repository: ChatsPostgresRepositoryInterface,
+            logger: logging.Logger,
+            batch_size: int = settings.chats.MESSAGES_BATCH_SIZE,
+            window_ms: int = settings.chats.MESSAGES_BATCH_WINDOW_MS,
+    ):
+        self.chats_pg_repository = chats_pg_repository
+        self.logger = logger
+        self.batch_size = batch_size
+        self.window = window_ms / 1000
+        self.queue: asyncio.Queue[tuple[MessageCreateSchema, asyncio.Future]] = asyncio.Queue(
+            maxsize=batch_size * 8,
+        )
+        self._task: Optional[asyncio.Task] = None
+        # пачка, которую _run собирает или записывает прямо сейчас
+        self._pending: list[tuple[MessageCreateSchema, asyncio.Future]] = []
+        self._flushing: Optional[asyncio.Future] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает сборку пачек и дописывает всё, что уже принято."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._flushing:
+            # запись защищена от отмены, дожидаемся её коммита
+            await self._flushing
+            self._flushing = None
+        batch, self._pending = self._pending, []
+        while batch or not self.queue.empty():
+            await self._flush(self._drain(batch))
+            batch = []
+
+    async def write(self, message_data: MessageCreateSchema) -> MessageSchema:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((message_data, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._pending = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(self._pending) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._pending.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            batch, self._pending = self._drain(self._pending), []
+            self._flushing = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self._flushing)
+            self._flushing = None
+
+    def _drain(self, batch: list) -> list:
+        while len(batch) < self.batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _flush(self, batch: list[tuple[MessageCreateSchema, asyncio.Future]]) -> None:
+        try:
+            messages = await self.chats_pg_repository.create_messages([message_data for message_data, _ in batch])
+        except Exception as e:
+            if len(batch) > 1:
+                # пачка откатилась целиком: пишем по одному, чтобы ошибку получил только виновный отправитель
+                self.logger.warning("Failed to write batch of %d messages, retrying one by one: %s", len(batch), e)
+                for item in batch:
+                    await self._flush([item])
+                return
+            self.logger.error("Failed to write message: %s", e)
+            _, future = batch[0]
+            if not future.done():
+                future.set_exception(e)
+            return
+        for (_, future), message in zip(batch, messages):
+            if not future.done():
+                future.set_result(message)
@@ -1,56 +1,79 @@
 import logging
 import uuid
+from typing import AsyncIterator, Optional
 
-from app.brokers.producer import get_kafka_producer
+from app.caches.lru import MISSING, TTLCache
+from app.configs.main import settings
 from app.filters.base import BaseFilter
-from app.interfaces.brokers import KafkaProducerInterface
+from app.filters.chats import InboxFilter
+from app.filters.messages import MessagesFilter
+from app.filters.search import SearchFilter
 from app.interfaces.repositories import ChatsPostgresRepositoryInterface
 from app.interfaces.services import ChatsServiceInterface
-from app.logger import get_logger
-from app.repositories.postgres import get_chats_pg_repository
-from app.schemas.chats import ChatCreateSchema, ChatSchema
-from app.schemas.messages import MessageCreateSchema, MessageSchema
+from app.schemas.chats import ChatCreateSchema, ChatSchema, InboxChatSchema
+from app.schemas.messages import MessageCreateSchema, MessageSchema, MessageSearchHitSchema
+from app.services.batching import MessageBatchWriter
 
 
 class ChatsService(ChatsServiceInterface):
     def __init__(
             self,
             chats_pg_repository: ChatsPostgresRepositoryInterface,
-            kafka_producer: KafkaProducerInterface,
             logger: logging.Logger,
+            message_writer: Optional[MessageBatchWriter] = None,
+            chats_cache: Optional[TTLCache] = None,
     ):
         self.chats_pg_repository = chats_pg_repository
-        self.kafka_producer = kafka_producer
         self.logger = logger
+        self.message_writer = message_writer
+        self.chats_cache = chats_cache
 
     async def get_my_chats(self, user_id: uuid.UUID, filters: BaseFilter) -> list[ChatSchema]:
         chats = await self.chats_pg_repository.get_my_chats(user_id, filters)
         return chats
 
-    async def get_chat_by_id(self, chat_id: uuid.UUID) -> ChatSchema:
+    async def get_chat_by_id(self, chat_id: uuid.UUID) -> Optional[ChatSchema]:
+        if self.chats_cache is None:
+            return await self.chats_pg_repository.get_chat_by_id(chat_id)
+        chat = self.chats_cache.get(chat_id)
+        if chat is not MISSING:
+            return chat
         chat = await self.chats_pg_repository.get_chat_by_id(chat_id)
+        ttl = None if chat else settings.chats.CHATS_CACHE_NEGATIVE_TTL
+        self.chats_cache.set(chat_id, chat, ttl=ttl)
         return chat
 
     async def create_chat(self, chat_data: ChatCreateSchema) -> ChatSchema:
         chat = await self.chats_pg_repository.create_chat(chat_data)
+        self.invalidate_chat(chat.chat_id)
         return chat
 
-    async def get_chat_messages(self, chat_id: uuid.UUID, filters: BaseFilter) -> list[MessageSchema]:
+    async def create_chats(self, chats_data: list[ChatCreateSchema]) -> list[ChatSchema]:
+        chats = await self.chats_pg_repository.create_chats(chats_data)
+        for chat in chats:
+            self.invalidate_chat(chat.chat_id)
+        return chats
+
+    def invalidate_chat(self, chat_id: uuid.UUID) -> None:
+        if self.chats_cache is not None:
+            self.chats_cache.invalidate(chat_id)
+
+    async def get_chat_messages(self, chat_id: uuid.UUID, filters: MessagesFilter) -> list[MessageSchema]:
         messages = await self.chats_pg_repository.get_chat_messages(chat_id, filters)
         return messages
 
     async def create_message(self, message_data: MessageCreateSchema) -> MessageSchema:
+        if self.message_writer and self.message_writer.running:
+            return await self.message_writer.write(message_data)
         message = await self.chats_pg_repository.create_message(message_data)
         return message
 
+    async def get_inbox(self, user_id: uuid.UUID, filters: InboxFilter) -> list[InboxChatSchema]:
+        chats = await self.chats_pg_repository.get_inbox(user_id, filters)
+        return chats
 
-def get_chats_service() -> ChatsService:
-    chats_pg_repository = get_chats_pg_repository()
-    kafka_producer = get_kafka_producer()
-    logger = get_logger()
+    async def mark_chat_read(self, chat_id: uuid.UUID, user_id: uuid.UUID) -> None:
+        await self.chats_pg_repository.mark_chat_read(chat_id, user_id)
 
-    return ChatsService(
-        chats_pg_repository=chats_pg_repository,
-        kafka_producer=kafka_producer,
-        logger=logger,
-    )
+    def search_messages(self, user_id: uuid.UUID, filters: SearchFilter) -> AsyncIterator[MessageSearchHitSchema]:
+        return self.chats_pg_repository.search_messages(user_id, filters)
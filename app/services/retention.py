@@ -0,0 +1,82 @@
+import asyncio
+import datetime
+import logging
+from typing import Optional
+
+from app.configs.main import settings
+from app.repositories.archive import MessageArchive, month_start, next_month
+from app.repositories.partitions import MessagePartitionsRepository
+
+
+class MessageRetentionJob:
+    """Обслуживание секций messages.
+
+    Заранее создаёт секции на partitions_ahead месяцев вперёд, чтобы новые
+    сообщения не попадали в messages_default. Секции, целиком старше
+    retention_days, выгружаются в архив и только после записи индекса архива
+    отсоединяются и удаляются, поэтому история не пропадает ни на момент.
+    """
+
+    def __init__(
+            self,
+            partitions_repository: MessagePartitionsRepository,
+            archive: MessageArchive,
+            logger: logging.Logger,
+            partitions_ahead: int = settings.chats.MESSAGES_PARTITIONS_AHEAD,
+            retention_days: int = settings.chats.MESSAGES_RETENTION_DAYS,
+            interval_s: float = settings.chats.MESSAGES_RETENTION_INTERVAL_S,
+    ):
+        self.partitions_repository = partitions_repository
+        self.archive = archive
+        self.logger = logger
+        self.partitions_ahead = partitions_ahead
+        self.retention_days = retention_days
+        self.interval = interval_s
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run_once(self, today: Optional[datetime.date] = None) -> None:
+        today = today or datetime.date.today()
+        async with self.partitions_repository.maintenance_lock() as acquired:
+            if not acquired:
+                return
+            existing = set(await self.partitions_repository.list_partitions())
+            month = month_start(today)
+            for _ in range(self.partitions_ahead + 1):
+                if month not in existing:
+                    await self.partitions_repository.create_partition(month)
+                    self.logger.info("Created messages partition for %s", month)
+                month = next_month(month)
+
+            cutoff = today - datetime.timedelta(days=self.retention_days)
+            for month in sorted(existing):
+                if next_month(month) > cutoff:
+                    break
+                await self._archive_partition(month)
+
+    async def _archive_partition(self, month: datetime.date) -> None:
+        writer = self.archive.begin_month(month)
+        try:
+            await self.partitions_repository.export_partition(month, writer)
+        except Exception:
+            writer.abort()
+            raise
+        writer.commit()
+        await self.partitions_repository.drop_partition(month)
+        self.logger.info("Archived messages partition for %s: %d messages", month, writer.count)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.logger.error("Messages retention failed: %s", e)
+            await asyncio.sleep(self.interval)
@@ -1,21 +1,42 @@
+import hashlib
+import time
 import uuid
 
 import jwt
 from fastapi import Depends
 from fastapi.security import APIKeyHeader
 
+from app.caches.lru import MISSING, TTLCache
 from app.configs.main import settings
 from app.exceptions.auth import InvalidTokenException
 
 api_key_header = APIKeyHeader(name="Authorization", auto_error=False)
 
+# Ключ — дайджест токена, значение — (user_id, exp)
+verified_tokens_cache = TTLCache(
+    maxsize=settings.secret.JWT_CACHE_SIZE,
+    ttl=settings.secret.JWT_CACHE_TTL,
+)
+
 
 def get_current_user_id(token: str = Depends(api_key_header)) -> uuid.UUID:
+    if not token:
+        raise InvalidTokenException
+    digest = hashlib.sha256(token.encode()).digest()
+    cached = verified_tokens_cache.get(digest)
+    if cached is not MISSING:
+        user_id, expires_at = cached
+        if expires_at is None or expires_at > time.time():
+            return user_id
+        verified_tokens_cache.invalidate(digest)
+
     try:
         payload = jwt.decode(token, settings.secret.JWT_SECRET, algorithms=[settings.secret.ALGORITHM])
-        user_id: uuid.UUID = payload.get("sub")
-        if user_id is None:
-            raise InvalidTokenException
-        return user_id
-    except jwt.PyJWTError:
+        user_id = uuid.UUID(payload["sub"])
+    except (jwt.PyJWTError, KeyError, TypeError, ValueError):
         raise InvalidTokenException
+
+    expires_at = payload.get("exp")
+    ttl = None if expires_at is None else min(expires_at - time.time(), verified_tokens_cache.ttl)
+    verified_tokens_cache.set(digest, (user_id, expires_at), ttl=ttl)
+    return user_id
@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+import os
+import signal
+import sys
+
+sys.path.insert(1, os.path.join(sys.path[0], '..'))
+
+from app.configs.main import settings
+from app.container import Container
+
+
+async def run_consumer(options: dict) -> None:
+    """Отдельный процесс только с консьюмером Kafka.
+
+    Уведомления о новых чатах уходят в веб-воркеры через backplane,
+    поэтому WS_BACKPLANE должен быть kafka.
+    """
+    container = Container()
+    container.run_consumer = True
+    container.run_retention = settings.chats.MESSAGES_RETENTION_ENABLED
+    container.serves_websockets = False
+    await container.start(**options)
+    container.logger.info("Kafka Consumer worker started.")
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, container.consumer_task.cancel)
+    try:
+        await container.consumer_task
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await container.stop()
+        container.logger.info("Kafka Consumer worker stopped.")
+
+
+def parse_options() -> dict:
+    parser = argparse.ArgumentParser(description="WALK Chat Kafka consumer worker")
+    parser.add_argument("--workers", type=int, default=settings.kafka.KAFKA_CONSUMER_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=settings.kafka.KAFKA_CONSUMER_BATCH_SIZE)
+    parser.add_argument("--batch-wait-ms", type=int, default=settings.kafka.KAFKA_CONSUMER_BATCH_WAIT_MS)
+    args = parser.parse_args()
+    return {"workers": args.workers, "batch_size": args.batch_size, "batch_wait_ms": args.batch_wait_ms}
+
+
+if __name__ == "__main__":
+    asyncio.run(run_consumer(parse_options()))
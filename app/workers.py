@@ -0,0 +1,12 @@
+from uvicorn.workers import UvicornWorker
+
+from app.configs.main import settings
+
+
+class ChatUvicornWorker(UvicornWorker):
+    """Uvicorn-воркер для gunicorn с настройками WebSocket из конфига."""
+
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        "ws_per_message_deflate": settings.websocket.WS_PER_MESSAGE_DEFLATE,
+    }
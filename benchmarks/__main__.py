@@ -0,0 +1,81 @@
+"""Бенчмарки REST, рассылки по WebSocket и приёма из Kafka на одной машине.
+
+    python -m benchmarks                      # все сценарии, сравнение с benchmarks/baseline.json
+    python -m benchmarks ws_fanout --quick    # один сценарий в уменьшенном размере
+    python -m benchmarks --update-baseline    # перезаписать базовую линию
+
+Каждый сценарий прогоняется --repeat раз, в отчёт и сравнение идёт медиана.
+
+Код возврата 1, если метрика ухудшилась относительно базовой линии больше чем на --tolerance.
+"""
+import argparse
+import asyncio
+import gc
+import os
+import statistics
+import sys
+
+from benchmarks.report import compare, format_report, load_baseline, save_results
+from benchmarks.scenarios import QUICK_PARAMS, SCENARIOS
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("scenarios", nargs="*", help=f"{', '.join(SCENARIOS)}; по умолчанию все")
+    parser.add_argument("--quick", action="store_true", help="уменьшенные размеры для проверки сценариев")
+    parser.add_argument("--repeat", type=int, default=3, help="прогонов каждого сценария, в отчёт идёт медиана")
+    parser.add_argument("--db-latency-ms", type=float, default=1.0, help="имитация round-trip до Postgres")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="допустимое ухудшение, доля")
+    parser.add_argument("--output", help="куда сохранить результаты в JSON")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+async def run(names: list[str], quick: bool, repeat: int, db_latency_ms: float) -> dict[str, dict[str, float]]:
+    results = {}
+    for name in names:
+        params = QUICK_PARAMS[name] if quick else {}
+        # прогрев: импорты, валидаторы pydantic и кэши не должны попадать в замер
+        await SCENARIOS[name](db_latency_ms=db_latency_ms, **QUICK_PARAMS[name])
+        runs = []
+        for _ in range(repeat):
+            # объекты предыдущих прогонов не должны попадать в сборки мусора следующего
+            gc.collect()
+            gc.freeze()
+            runs.append(await SCENARIOS[name](db_latency_ms=db_latency_ms, **params))
+        results[name] = {metric: statistics.median(run[metric] for run in runs) for metric in runs[0]}
+    return results
+
+
+def main() -> int:
+    args = parse_args()
+    names = args.scenarios or list(SCENARIOS)
+    params = {"quick": args.quick, "db_latency_ms": args.db_latency_ms}
+    results = asyncio.run(run(names, args.quick, args.repeat, args.db_latency_ms))
+
+    baseline = None if args.update_baseline else load_baseline(args.baseline)
+    # базовая линия снята в полном размере, с --quick сравнивать не с чем
+    comparable = baseline and baseline["params"] == params
+    print(format_report(results, baseline["results"] if comparable else None))
+    if args.output:
+        save_results(args.output, results, params)
+    if args.update_baseline:
+        save_results(args.baseline, results, params)
+        return 0
+    if not comparable:
+        return 0
+    regressions = compare(results, baseline["results"], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
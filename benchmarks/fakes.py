@@ -0,0 +1,316 @@
+import asyncio
+import bisect
+import datetime
+import time
+import uuid
+from collections import Counter
+from typing import AsyncIterator, Optional
+
+from aiokafka import ConsumerRecord, TopicPartition
+
+from app.exceptions.chat import ChatExistsException
+from app.filters.base import BaseFilter
+from app.filters.chats import InboxFilter
+from app.filters.cursors import decode_cursor, decode_search_cursor
+from app.filters.messages import MessagesFilter
+from app.filters.search import SearchFilter
+from app.interfaces.brokers import KafkaProducerInterface
+from app.interfaces.repositories import ChatsPostgresRepositoryInterface
+from app.schemas.chats import ChatCreateSchema, ChatSchema, InboxChatSchema
+from app.schemas.messages import MessageCreateSchema, MessageSchema, MessageSearchHitSchema
+
+
+class ChatState:
+    __slots__ = ("chat", "messages", "keys", "last_activity_at")
+
+    def __init__(self, chat: ChatSchema):
+        self.chat = chat
+        # от старых к новым, keys — (created_at, message_id) для bisect
+        self.messages: list[MessageSchema] = []
+        self.keys: list[tuple[datetime.datetime, uuid.UUID]] = []
+        self.last_activity_at = chat.created_at
+
+
+class InMemoryChatsRepository(ChatsPostgresRepositoryInterface):
+    """Репозиторий в памяти с семантикой ChatsPostgresRepository.
+
+    Каждый вызов считается одним обращением к БД и может ждать latency_ms,
+    чтобы имитировать round-trip до Postgres.
+    """
+
+    def __init__(self, latency_ms: float = 0):
+        self.latency = latency_ms / 1000
+        self.calls: Counter[str] = Counter()
+        self.chats: dict[uuid.UUID, ChatState] = {}
+        self.pairs: set[tuple[uuid.UUID, uuid.UUID]] = set()
+        self.user_chats: dict[uuid.UUID, list[uuid.UUID]] = {}
+        self.unread: Counter[tuple[uuid.UUID, uuid.UUID]] = Counter()
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    async def get_my_chats(self, user_id: uuid.UUID, filters: BaseFilter) -> list[ChatSchema]:
+        await self._query("get_my_chats")
+        chat_ids = self.user_chats.get(user_id, [])[filters.offset:filters.offset + filters.limit]
+        return [self.chats[chat_id].chat for chat_id in chat_ids]
+
+    async def get_chat_by_id(self, chat_id: uuid.UUID) -> Optional[ChatSchema]:
+        await self._query("get_chat_by_id")
+        state = self.chats.get(chat_id)
+        return state.chat if state else None
+
+    async def create_chat(self, chat_data: ChatCreateSchema) -> ChatSchema:
+        await self._query("create_chat")
+        chat = self._insert_chat(chat_data)
+        if chat is None:
+            raise ChatExistsException
+        return chat
+
+    async def create_chats(self, chats_data: list[ChatCreateSchema]) -> list[ChatSchema]:
+        await self._query("create_chats")
+        chats = [self._insert_chat(chat_data) for chat_data in chats_data]
+        return [chat for chat in chats if chat]
+
+    async def create_message(self, message_data: MessageCreateSchema) -> MessageSchema:
+        messages = await self.create_messages([message_data])
+        return messages[0]
+
+    async def create_messages(self, messages_data: list[MessageCreateSchema]) -> list[MessageSchema]:
+        await self._query("create_messages")
+        messages = []
+        for message_data in messages_data:
+            message = MessageSchema(
+                message_id=uuid.uuid4(),
+                created_at=datetime.datetime.now(),
+                **message_data.model_dump(),
+            )
+            state = self.chats[message.chat_id]
+            state.messages.append(message)
+            state.keys.append((message.created_at, message.message_id))
+            state.last_activity_at = message.created_at
+            recipient = state.chat.user2_id if state.chat.user1_id == message.user_id else state.chat.user1_id
+            self.unread[(message.chat_id, recipient)] += 1
+            self.unread.pop((message.chat_id, message.user_id), None)
+            messages.append(message)
+        return messages
+
+    async def get_chat_messages(self, chat_id: uuid.UUID, filters: MessagesFilter) -> list[MessageSchema]:
+        await self._query("get_chat_messages")
+        state = self.chats.get(chat_id)
+        if state is None:
+            return []
+        if filters.after:
+            start = bisect.bisect_right(state.keys, decode_cursor(filters.after))
+            return list(reversed(state.messages[start:start + filters.limit]))
+        if filters.before:
+            end = bisect.bisect_left(state.keys, decode_cursor(filters.before))
+        else:
+            end = max(len(state.keys) - filters.offset, 0)
+        return list(reversed(state.messages[max(end - filters.limit, 0):end]))
+
+    async def get_inbox(self, user_id: uuid.UUID, filters: InboxFilter) -> list[InboxChatSchema]:
+        await self._query("get_inbox")
+        states = sorted(
+            (self.chats[chat_id] for chat_id in self.user_chats.get(user_id, [])),
+            key=lambda state: (state.last_activity_at, state.chat.chat_id),
+            reverse=True,
+        )
+        if filters.before:
+            position = decode_cursor(filters.before)
+            states = [state for state in states if (state.last_activity_at, state.chat.chat_id) < position]
+        else:
+            states = states[filters.offset:]
+        return [
+            InboxChatSchema(
+                **state.chat.model_dump(),
+                last_message=state.messages[-1] if state.messages else None,
+                last_activity_at=state.last_activity_at,
+                unread_count=self.unread[(state.chat.chat_id, user_id)],
+            )
+            for state in states[:filters.limit]
+        ]
+
+    async def mark_chat_read(self, chat_id: uuid.UUID, user_id: uuid.UUID) -> None:
+        await self._query("mark_chat_read")
+        self.unread.pop((chat_id, user_id), None)
+
+    async def search_messages(self, user_id: uuid.UUID, filters: SearchFilter) -> AsyncIterator[MessageSearchHitSchema]:
+        """Подстрока вместо полнотекстового поиска, rank у всех совпадений одинаковый."""
+        await self._query("search_messages")
+        position = decode_search_cursor(filters.cursor)[1:] if filters.cursor else None
+        chat_ids = [filters.chat_id] if filters.chat_id else self.user_chats.get(user_id, [])
+        needle = filters.q.lower()
+        hits = sorted(
+            (
+                message
+                for chat_id in chat_ids if chat_id in self.chats
+                for message in self.chats[chat_id].messages
+                if needle in message.message_content.lower()
+            ),
+            key=lambda message: (message.created_at, message.message_id),
+            reverse=True,
+        )
+        if position:
+            hits = [message for message in hits if (message.created_at, message.message_id) < position]
+        for message in hits[:filters.limit]:
+            yield MessageSearchHitSchema(**message.model_dump(), rank=1.0, snippet=message.message_content)
+
+    def _insert_chat(self, chat_data: ChatCreateSchema) -> Optional[ChatSchema]:
+        pair = (chat_data.user1_id, chat_data.user2_id)
+        if pair in self.pairs:
+            return None
+        self.pairs.add(pair)
+        chat = ChatSchema(chat_id=uuid.uuid4(), created_at=datetime.datetime.now(), **chat_data.model_dump())
+        self.chats[chat.chat_id] = ChatState(chat)
+        for user_id in pair:
+            self.user_chats.setdefault(user_id, []).append(chat.chat_id)
+        return chat
+
+    async def _query(self, name: str) -> None:
+        self.calls[name] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+class FakeKafkaProducer(KafkaProducerInterface):
+    """Продюсер без брокера: записи только считаются."""
+
+    chats_topic = "chats"
+    messages_topic = "messages"
+
+    def __init__(self):
+        self.counters = {"sent": 0, "failed": 0}
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def sent_message(self, topic: str, data: dict, key: Optional[str] = None) -> None:
+        self.counters["sent"] += 1
+
+    async def send_batch(self, records: list[tuple[str, Optional[str], dict]]) -> None:
+        self.counters["sent"] += len(records)
+
+    def stats(self) -> dict[str, int]:
+        return dict(self.counters)
+
+
+class FakeKafkaSource:
+    """Подменяет AIOKafkaConsumer внутри KafkaConsumer: отдаёт заранее подготовленные записи по партициям.
+
+    Для каждой пачки запоминает время выдачи, чтобы измерить задержку до коммита.
+    """
+
+    def __init__(self, records: list[ConsumerRecord]):
+        self.partitions: dict[TopicPartition, list[ConsumerRecord]] = {}
+        for record in records:
+            self.partitions.setdefault(TopicPartition(record.topic, record.partition), []).append(record)
+        self.positions = {partition: 0 for partition in self.partitions}
+        self.commits: dict[TopicPartition, int] = {}
+        self.total = len(records)
+        self.committed_total = 0
+        self.commit_latencies: list[float] = []
+        self._issued: dict[tuple[TopicPartition, int], float] = {}
+        self._paused: set[TopicPartition] = set()
+        self._next_partition = 0
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def assignment(self) -> set[TopicPartition]:
+        return set(self.partitions)
+
+    def pause(self, *partitions: TopicPartition) -> None:
+        self._paused.update(partitions)
+
+    def resume(self, *partitions: TopicPartition) -> None:
+        self._paused.difference_update(partitions)
+
+    def paused(self) -> set[TopicPartition]:
+        return set(self._paused)
+
+    async def getmany(self, timeout_ms: int = 0, max_records: Optional[int] = None) -> dict:
+        """Партиции обходятся по кругу, как при равномерной загрузке брокера."""
+        batch: dict[TopicPartition, list[ConsumerRecord]] = {}
+        budget = max_records or self.total
+        partitions = [partition for partition in self.partitions if partition not in self._paused]
+        for step in range(len(partitions)):
+            if budget <= 0:
+                break
+            partition = partitions[(self._next_partition + step) % len(partitions)]
+            position = self.positions[partition]
+            records = self.partitions[partition][position:position + budget]
+            if records:
+                batch[partition] = records
+                self.positions[partition] = position + len(records)
+                self._issued[(partition, records[-1].offset + 1)] = time.perf_counter()
+                budget -= len(records)
+        self._next_partition += 1
+        if not batch:
+            await asyncio.sleep(timeout_ms / 1000)
+        return batch
+
+    async def commit(self, offsets: dict[TopicPartition, int]) -> None:
+        now = time.perf_counter()
+        for partition, offset in offsets.items():
+            self.committed_total += offset - self.commits.get(partition, 0)
+            self.commits[partition] = offset
+            issued = self._issued.pop((partition, offset), None)
+            if issued is not None:
+                self.commit_latencies.append(now - issued)
+
+    async def committed(self, partition: TopicPartition) -> Optional[int]:
+        return self.commits.get(partition)
+
+    def seek(self, partition: TopicPartition, offset: int) -> None:
+        self.positions[partition] = offset
+
+    def highwater(self, partition: TopicPartition) -> int:
+        return len(self.partitions[partition])
+
+    async def position(self, partition: TopicPartition) -> int:
+        return self.positions[partition]
+
+
+def make_match_record(topic: str, partition: int, offset: int, value: bytes) -> ConsumerRecord:
+    return ConsumerRecord(
+        topic=topic,
+        partition=partition,
+        offset=offset,
+        timestamp=int(time.time() * 1000),
+        timestamp_type=0,
+        key=None,
+        value=value,
+        checksum=None,
+        serialized_key_size=0,
+        serialized_value_size=len(value),
+        headers=[],
+    )
+
+
+class SimulatedWebSocket:
+    """Клиентский сокет без сети: запоминает отправленные кадры и момент отправки."""
+
+    __slots__ = ("scope", "received")
+
+    def __init__(self, binary: bool = False):
+        self.scope = {"subprotocols": ["walk.msgpack.v1"] if binary else []}
+        self.received: list[tuple[object, float]] = []
+
+    async def accept(self, subprotocol: Optional[str] = None) -> None:
+        pass
+
+    async def send_text(self, data: str) -> None:
+        self.received.append((data, time.perf_counter()))
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.received.append((data, time.perf_counter()))
+
+    async def close(self, code: int = 1000) -> None:
+        pass
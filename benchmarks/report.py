@@ -0,0 +1,68 @@
+import json
+import math
+import os
+import platform
+from typing import Optional
+
+Results = dict[str, dict[str, float]]
+
+# Для метрик пропускной способности больше — лучше, для остальных (задержки, память, запросы) — меньше
+HIGHER_IS_BETTER_SUFFIX = "_per_s"
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Перцентиль по ближайшему рангу, без интерполяции."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def environment() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpus": str(os.cpu_count()),
+    }
+
+
+def load_baseline(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_results(path: str, results: Results, params: dict) -> None:
+    with open(path, "w") as results_file:
+        json.dump({"environment": environment(), "params": params, "results": results}, results_file, indent=2)
+        results_file.write("\n")
+
+
+def compare(results: Results, baseline: Results, tolerance: float) -> list[str]:
+    """Метрики, ухудшившиеся относительно базовой линии больше чем на tolerance."""
+    regressions = []
+    for scenario, metrics in results.items():
+        for name, value in metrics.items():
+            base = baseline.get(scenario, {}).get(name)
+            if not base:
+                continue
+            change = (value - base) / base
+            worse = -change if name.endswith(HIGHER_IS_BETTER_SUFFIX) else change
+            if worse > tolerance:
+                regressions.append(f"{scenario}.{name}: {base:g} -> {value:g} ({change:+.0%})")
+    return regressions
+
+
+def format_report(results: Results, baseline: Optional[Results] = None) -> str:
+    baseline = baseline or {}
+    lines = [f"{'scenario':<14} {'metric':<32} {'value':>14} {'baseline':>14} {'change':>8}"]
+    for scenario, metrics in results.items():
+        for name, value in metrics.items():
+            base = baseline.get(scenario, {}).get(name)
+            change = f"{(value - base) / base:+.0%}" if base else ""
+            base_text = f"{base:,.4g}" if base is not None else "-"
+            lines.append(f"{scenario:<14} {name:<32} {value:>14,.4g} {base_text:>14} {change:>8}")
+    return "\n".join(lines)
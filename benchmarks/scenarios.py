@@ -0,0 +1,289 @@
+import asyncio
+import gc
+import json
+import logging
+import random
+import time
+import tracemalloc
+import uuid
+
+import jwt
+import msgpack
+from httpx import ASGITransport, AsyncClient
+
+from app.brokers.backplane import LoopbackBackplane
+from app.brokers.consumer import build_kafka_consumer
+from app.configs.main import settings
+from app.container import Container
+from app.main import app
+from app.schemas.chats import ChatCreateSchema
+from app.schemas.messages import MessageCreateSchema
+from benchmarks.fakes import (
+    FakeKafkaProducer,
+    FakeKafkaSource,
+    InMemoryChatsRepository,
+    SimulatedWebSocket,
+    make_match_record,
+)
+from benchmarks.report import percentile
+
+logger = logging.getLogger("benchmarks")
+
+# Сколько ждать новых доставок, прежде чем считать рассылку законченной
+IDLE_TIMEOUT_S = 2
+
+
+def build_container(repository: InMemoryChatsRepository) -> Container:
+    """Контейнер приложения поверх репозитория в памяти, без Kafka и Postgres."""
+    container = Container(
+        logger=logger,
+        kafka_producer=FakeKafkaProducer(),
+        backplane=LoopbackBackplane(logger=logger),
+        chats_pg_repository=repository,
+    )
+    container.run_consumer = False
+    container.run_outbox_relay = False
+    return container
+
+
+async def seed_chats(repository: InMemoryChatsRepository, users: int, chats_per_user: int) -> list[uuid.UUID]:
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    chats = []
+    for index, user_id in enumerate(user_ids):
+        for step in range(1, chats_per_user + 1):
+            chats.append(ChatCreateSchema(user1_id=user_id, user2_id=user_ids[(index + step) % users]))
+    await repository.create_chats(chats)
+    return user_ids
+
+
+async def run_rest(
+        requests: int = 5000,
+        concurrency: int = 50,
+        users: int = 500,
+        chats_per_user: int = 10,
+        messages_per_chat: int = 50,
+        db_latency_ms: float = 1.0,
+) -> dict[str, float]:
+    """Смесь REST-запросов: входящие, страница истории чата и список чатов."""
+    repository = InMemoryChatsRepository()
+    user_ids = await seed_chats(repository, users, chats_per_user)
+    for state in list(repository.chats.values()):
+        await repository.create_messages([
+            MessageCreateSchema(chat_id=state.chat.chat_id, user_id=state.chat.user1_id, message_content=f"m{index}")
+            for index in range(messages_per_chat)
+        ])
+    repository.calls.clear()
+    repository.latency = db_latency_ms / 1000
+
+    previous_container = getattr(app.state, "container", None)
+    app.state.container = build_container(repository)
+    tokens = {
+        user_id: jwt.encode({"sub": str(user_id)}, settings.secret.JWT_SECRET, algorithm=settings.secret.ALGORITHM)
+        for user_id in user_ids
+    }
+    rng = random.Random(1)
+    plan = []
+    for _ in range(requests):
+        user_id = rng.choice(user_ids)
+        roll = rng.random()
+        if roll < 0.4:
+            url = "/chats/inbox"
+        elif roll < 0.8:
+            url = f"/chats/{rng.choice(repository.user_chats[user_id])}?limit=30"
+        else:
+            url = "/chats/my"
+        plan.append((url, tokens[user_id]))
+
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker(client: AsyncClient, share: list[tuple[str, str]]) -> None:
+        nonlocal errors
+        for url, token in share:
+            started = time.perf_counter()
+            response = await client.get(url, headers={"Authorization": token})
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    transport = ASGITransport(app=app)
+    try:
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(client, plan[index::concurrency]) for index in range(concurrency)))
+            elapsed = time.perf_counter() - started
+    finally:
+        app.state.container = previous_container
+
+    return {
+        "requests_per_s": requests / elapsed,
+        "latency_p50_ms": percentile(latencies, 50) * 1000,
+        "latency_p99_ms": percentile(latencies, 99) * 1000,
+        "db_calls_per_request": repository.total_calls / requests,
+        "errors": errors,
+    }
+
+
+async def run_ws_fanout(
+        clients: int = 5000,
+        chat_size: int = 50,
+        messages: int = 1000,
+        senders: int = 50,
+        binary_share: float = 0.2,
+        db_latency_ms: float = 1.0,
+) -> dict[str, float]:
+    """Сообщения из сокетов в чаты по chat_size подписчиков: запись в БД пачками и рассылка по очередям.
+
+    Задержка доставки считается от вызова send_message до отправки кадра в сокет получателя.
+    """
+    repository = InMemoryChatsRepository()
+    chats = clients // chat_size
+    await seed_chats(repository, chats * 2, 1)
+    chat_states = list(repository.chats.values())[:chats]
+    repository.calls.clear()
+    repository.latency = db_latency_ms / 1000
+
+    container = build_container(repository)
+    ws_manager = container.ws_manager
+    if container.message_writer:
+        await container.message_writer.start()
+
+    rng = random.Random(2)
+    sockets = [SimulatedWebSocket(binary=rng.random() < binary_share) for _ in range(chats * chat_size)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    connections = []
+    for index, websocket in enumerate(sockets):
+        connections.append(await ws_manager.connect_chat(chat_states[index % chats].chat.chat_id, websocket))
+    # писатели сокетов стартуют на следующей итерации цикла
+    await asyncio.sleep(0)
+    memory_per_connection = (tracemalloc.get_traced_memory()[0] - before) / len(sockets)
+    tracemalloc.stop()
+    registry_per_connection = ws_manager.registry.memory_footprint()["bytes_per_connection"]
+
+    sent_at: dict[str, float] = {}
+
+    async def sender(offset: int) -> None:
+        for sequence in range(offset, messages, senders):
+            state = chat_states[sequence % chats]
+            content = f"m{sequence}"
+            sent_at[content] = time.perf_counter()
+            await ws_manager.send_message(state.chat.chat_id, state.chat.user1_id, content)
+
+    expected = messages * chat_size
+    started = time.perf_counter()
+    await asyncio.gather(*(sender(offset) for offset in range(senders)))
+    # вытесненные медленные клиенты свои кадры уже не получат, поэтому ждём, пока доставка идёт
+    delivered, progress_at = 0, time.perf_counter()
+    while delivered < expected and time.perf_counter() - progress_at < IDLE_TIMEOUT_S:
+        await asyncio.sleep(0.005)
+        received = sum(len(websocket.received) for websocket in sockets)
+        if received > delivered:
+            delivered, progress_at = received, time.perf_counter()
+    elapsed = progress_at - started
+
+    # один и тот же кадр уходит всем получателям, поэтому декодируем каждый объект один раз
+    contents: dict[int, str] = {}
+    latencies = []
+    for websocket in sockets:
+        for frame, received_at in websocket.received:
+            content = contents.get(id(frame))
+            if content is None:
+                content = contents[id(frame)] = _frame_content(frame)
+            latencies.append(received_at - sent_at[content])
+
+    for connection in connections:
+        await connection.close()
+    if container.message_writer:
+        await container.message_writer.stop()
+
+    return {
+        "messages_per_s": messages / elapsed,
+        "deliveries_per_s": len(latencies) / elapsed,
+        "delivery_p50_ms": percentile(latencies, 50) * 1000,
+        "delivery_p99_ms": percentile(latencies, 99) * 1000,
+        "memory_per_connection_bytes": memory_per_connection,
+        "registry_bytes_per_connection": registry_per_connection,
+        "db_calls_per_message": repository.total_calls / messages,
+        "evicted": ws_manager.stats()["evicted_total"],
+    }
+
+
+async def run_kafka_ingest(
+        records: int = 50000,
+        partitions: int = 8,
+        batch_size: int = 500,
+        workers: int = 4,
+        duplicate_share: float = 0.05,
+        db_latency_ms: float = 1.0,
+) -> dict[str, float]:
+    """Матчи из Kafka: пачки по партициям, запись чатов пачками, коммит оффсетов после сохранения."""
+    repository = InMemoryChatsRepository(latency_ms=db_latency_ms)
+    container = build_container(repository)
+    rng = random.Random(3)
+    users = [str(uuid.uuid4()) for _ in range(records)]
+    kafka_records = []
+    offsets = [0] * partitions
+    for index in range(records):
+        if index and rng.random() < duplicate_share:
+            pair = kafka_records[rng.randrange(len(kafka_records))][1]
+        else:
+            pair = {"user1_id": users[index], "user2_id": users[(index + 1) % records]}
+        partition = index % partitions
+        value = json.dumps(pair).encode()
+        kafka_records.append((make_match_record("matches", partition, offsets[partition], value), pair))
+        offsets[partition] += 1
+    source = FakeKafkaSource([record for record, _ in kafka_records])
+
+    consumer = build_kafka_consumer(
+        chats_service=container.chats_service,
+        ws_manager=container.ws_manager,
+        producer=container.kafka_producer,
+        message_writer=container.message_writer,
+        logger=logger,
+        # репозиторий в памяти не берёт соединения из пула
+        pool_saturation=lambda: 0.0,
+        batch_size=batch_size,
+        workers=workers,
+    )
+    # настоящий AIOKafkaConsumer не запускался, закрываем его до подмены
+    await consumer.consumer.stop()
+    consumer.consumer = source
+    await consumer.start()
+    started = time.perf_counter()
+    task = asyncio.create_task(consumer.process_messages())
+    while source.committed_total < records and not task.done():
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - started
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await consumer.stop()
+
+    return {
+        "records_per_s": records / elapsed,
+        "commit_p50_ms": percentile(source.commit_latencies, 50) * 1000,
+        "commit_p99_ms": percentile(source.commit_latencies, 99) * 1000,
+        "db_calls_per_record": repository.total_calls / records,
+        "duplicates": consumer.counters["duplicates"],
+    }
+
+
+def _frame_content(frame: object) -> str:
+    if isinstance(frame, bytes):
+        return msgpack.unpackb(frame, raw=False)["message_content"]
+    return json.loads(frame)["message_content"]
+
+
+SCENARIOS = {
+    "rest": run_rest,
+    "ws_fanout": run_ws_fanout,
+    "kafka_ingest": run_kafka_ingest,
+}
+
+# Уменьшенные размеры для быстрой проверки, что сценарии работают
+QUICK_PARAMS = {
+    "rest": {"requests": 200, "concurrency": 10, "users": 50, "chats_per_user": 3, "messages_per_chat": 5},
+    "ws_fanout": {"clients": 200, "chat_size": 20, "messages": 50, "senders": 5},
+    "kafka_ingest": {"records": 500, "partitions": 4, "batch_size": 100, "workers": 2},
+}
@@ -2,4 +2,4 @@
 
 alembic upgrade head
 
-gunicorn app.main:app --workers 4 --worker-class uvicorn.workers.UvicornWorker --bind=0.0.0.0:8000
+gunicorn app.main:app --workers 4 --worker-class app.workers.ChatUvicornWorker --bind=0.0.0.0:8000
@@ -14,13 +14,12 @@ from sqlalchemy import insert
 from app.database import Base
 from app.main import app as fastapi_app
 from app.models.chats import Chats
-from app.services.chats import get_chats_service
 from app.utils import get_current_user_id
+from tests.dependencies.container import get_test_container
 from tests.dependencies.database import async_session_maker, engine
-from tests.dependencies.services import get_test_chats_service
-from tests.dependencies.users import mock_get_current_user_id
+from tests.dependencies.users import TEST_USER_ID, make_token, mock_get_current_user_id
 
-fastapi_app.dependency_overrides[get_chats_service] = get_test_chats_service
+fastapi_app.state.container = get_test_container()
 fastapi_app.dependency_overrides[get_current_user_id] = mock_get_current_user_id
 
 
@@ -60,9 +59,7 @@ async def authenticated_async_client():
     async with AsyncClient(transport=ASGITransport(app=fastapi_app), base_url="http://test") as async_client:
         async_client.headers = {
             **async_client.headers,
-            "Authorization": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9."
-                             "eyJzdWIiOiI5YzkyYWFiYi0zNzcxLTQ3NTYtOTdjYy1iNzgxMzcxZmYxOWEiLCJleHAiOjE3NjYxMzQ5NzJ9."
-                             "uW6ZV8dhu7Qdjia-oiIYWwmTY5eXnZs3LtjE8GDlNqs",
+            "Authorization": make_token(TEST_USER_ID, expires_in=3600),
         }
         yield async_client
 
@@ -72,8 +69,6 @@ def ws_authenticated_client():
     with TestClient(fastapi_app) as ws_client:
         ws_client.headers = {
             **ws_client.headers,
-            "Authorization": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9."
-                             "eyJzdWIiOiI5YzkyYWFiYi0zNzcxLTQ3NTYtOTdjYy1iNzgxMzcxZmYxOWEiLCJleHAiOjE3NjYxMzQ5NzJ9."
-                             "uW6ZV8dhu7Qdjia-oiIYWwmTY5eXnZs3LtjE8GDlNqs",
+            "Authorization": make_token(TEST_USER_ID, expires_in=3600),
         }
         yield ws_client
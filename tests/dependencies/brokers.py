@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 
 def get_mocked_kafka_consumer():
@@ -8,13 +8,19 @@ def get_mocked_kafka_consumer():
     mock_producer.subscribe = MagicMock()
     mock_producer.consume_messages = MagicMock()
     mock_producer.process_messages = MagicMock()
+    mock_producer.run = MagicMock()
     return mock_producer
 
 
 def get_mocked_kafka_producer():
     mock_producer = MagicMock()
-    mock_producer.start = MagicMock()
-    mock_producer.stop = MagicMock()
+    mock_producer.start = AsyncMock()
+    mock_producer.stop = AsyncMock()
     mock_producer.send = MagicMock()
     mock_producer.send_message = MagicMock()
+    mock_producer.sent_message = AsyncMock()
+    mock_producer.send_batch = AsyncMock()
+    mock_producer.stats = MagicMock(return_value={"sent": 0, "failed": 0})
+    mock_producer.chats_topic = "chats"
+    mock_producer.messages_topic = "messages"
     return mock_producer
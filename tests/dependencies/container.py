@@ -0,0 +1,18 @@
+from app.brokers.backplane import LoopbackBackplane
+from app.container import Container
+from tests.dependencies.brokers import get_mocked_kafka_producer
+from tests.dependencies.database import get_test_session_maker
+from tests.dependencies.logger import get_mocked_logger
+
+
+def get_test_container() -> Container:
+    logger = get_mocked_logger()
+    container = Container(
+        logger=logger,
+        session_maker=get_test_session_maker(),
+        kafka_producer=get_mocked_kafka_producer(),
+        backplane=LoopbackBackplane(logger=logger),
+    )
+    container.run_consumer = False
+    container.run_outbox_relay = False
+    return container
@@ -1,13 +1,22 @@
+import time
 import uuid
 
+import jwt
 from fastapi import Depends
 
+from app.configs.main import settings
 from app.exceptions.auth import InvalidTokenException
 from app.utils import api_key_header
 
+TEST_USER_ID = uuid.UUID("9c92aabb-3771-4756-97cc-b781371ff19a")
+
+
+def make_token(user_id: uuid.UUID, expires_in: int) -> str:
+    payload = {"sub": str(user_id), "exp": int(time.time()) + expires_in}
+    return jwt.encode(payload, settings.secret.JWT_SECRET, algorithm=settings.secret.ALGORITHM)
+
 
 async def mock_get_current_user_id(token: str = Depends(api_key_header)) -> uuid.UUID:
     if token:
-        user_id = "9c92aabb-3771-4756-97cc-b781371ff19a"
-        return uuid.UUID(user_id)
+        return TEST_USER_ID
     raise InvalidTokenException
@@ -1,8 +1,16 @@
+import uuid
+from unittest.mock import AsyncMock
+
+import msgpack
 import pytest
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
 from starlette.websockets import WebSocketDisconnect
 
+from app.main import app as fastapi_app
+from app.repositories.outbox import OutboxRepository
+from tests.dependencies.database import get_test_session_maker
+
 
 async def test_get_my_chats(
         async_client: AsyncClient,
@@ -37,6 +45,78 @@ def test_ws_get_chat_messages(
         assert message["chat_id"] == chat_id
 
 
+def test_ws_binary_subprotocol(
+        ws_authenticated_client: TestClient,
+):
+    chat_id = "ddf79876-07e4-4340-af35-a44daa778c19"
+    url = f"chats/ws/{chat_id}?limit=0"
+    with ws_authenticated_client.websocket_connect(url, subprotocols=["walk.msgpack.v1"]) as ws:
+        assert ws.accepted_subprotocol == "walk.msgpack.v1"
+        ws.send_bytes(msgpack.packb("Здорова брательник"))
+        message = msgpack.unpackb(ws.receive_bytes())
+        assert uuid.UUID(bytes=message["chat_id"]) == uuid.UUID(chat_id)
+        assert isinstance(message["created_at"], int)
+
+
+async def test_get_chat_messages_by_cursor(
+        authenticated_async_client: AsyncClient,
+):
+    url = "/chats/ddf79876-07e4-4340-af35-a44daa778c19"
+    response = await authenticated_async_client.get(url, params={"limit": 1})
+    assert response.status_code == 200
+    first_page = response.json()
+    cursor = response.headers["X-Next-Cursor"]
+    response = await authenticated_async_client.get(url, params={"limit": 1, "before": cursor})
+    assert response.status_code == 200
+    second_page = response.json()
+    assert second_page[0]["created_at"] <= first_page[0]["created_at"]
+    assert second_page[0]["message_id"] != first_page[0]["message_id"]
+    response = await authenticated_async_client.get(url, params={"before": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_search_messages(
+        ws_authenticated_client: TestClient,
+):
+    chat_id = "ddf79876-07e4-4340-af35-a44daa778c19"
+    with ws_authenticated_client.websocket_connect(f"chats/ws/{chat_id}?limit=0") as ws:
+        ws.send_text("Встречаемся у фонтана в парке")
+        ws.receive_json()
+    response = ws_authenticated_client.get("/chats/search", params={"q": "фонтаны", "chat_id": chat_id, "limit": 1})
+    assert response.status_code == 200
+    result = response.json()
+    assert len(result["hits"]) == 1
+    assert "<mark>фонтана</mark>" in result["hits"][0]["snippet"]
+    response = ws_authenticated_client.get("/chats/search", params={"q": "фонтаны", "cursor": result["next_cursor"]})
+    assert response.status_code == 200
+    assert all(hit["message_id"] != result["hits"][0]["message_id"] for hit in response.json()["hits"])
+    response = ws_authenticated_client.get("/chats/search", params={"q": "фонтаны", "cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+async def test_get_inbox(
+        authenticated_async_client: AsyncClient,
+):
+    response = await authenticated_async_client.get(url="/chats/inbox")
+    assert response.status_code == 200
+    chats = response.json()
+    assert len(chats) == 2
+    assert chats[0]["last_activity_at"] >= chats[1]["last_activity_at"]
+    assert chats[0]["chat_id"] == "ddf79876-07e4-4340-af35-a44daa778c19"
+    assert chats[0]["last_message"] is not None
+
+
+async def test_mark_chat_read(
+        authenticated_async_client: AsyncClient,
+):
+    chat_id = "ddf79876-07e4-4340-af35-a44daa778c19"
+    response = await authenticated_async_client.post(url=f"/chats/{chat_id}/read")
+    assert response.status_code == 200
+    response = await authenticated_async_client.get(url="/chats/inbox")
+    inbox = {chat["chat_id"]: chat for chat in response.json()}
+    assert inbox[chat_id]["unread_count"] == 0
+
+
 async def test_create_chat(
         async_client: AsyncClient,
 ):
@@ -48,3 +128,58 @@ async def test_create_chat(
     assert response.status_code == 200
     chat = response.json()
     assert user_ids["user1_id"] == chat["user1_id"]
+    response = await async_client.post(url="/chats/create_chat", json=user_ids)
+    assert response.status_code == 409
+
+
+async def test_create_chat_writes_outbox_event(
+        async_client: AsyncClient,
+):
+    user_ids = {
+        "user1_id": "5b0e5a33-8a47-4d1b-9d6c-0c7f3d2e9a10",
+        "user2_id": "8f3c2d1e-6b5a-4c9d-8e7f-1a2b3c4d5e6f",
+    }
+    response = await async_client.post(url="/chats/create_chat", json=user_ids)
+    assert response.status_code == 200
+    chat = response.json()
+
+    outbox_repository = OutboxRepository(session_maker=get_test_session_maker())
+    deliver = AsyncMock()
+    while await outbox_repository.relay_batch(100, deliver):
+        pass
+    events = [event for call in deliver.await_args_list for event in call.args[0]]
+    chat_events = [event for event in events if event.key == chat["chat_id"]]
+    assert len(chat_events) == 1
+    assert chat_events[0].payload == {"event": "chat_created", "data": chat}
+    assert await outbox_repository.relay_batch(100, deliver) == 0
+
+
+async def test_readiness(
+        async_client: AsyncClient,
+):
+    # без lifespan контейнер не запущен
+    response = await async_client.get(url="/health/ready")
+    assert response.status_code == 503
+    with TestClient(fastapi_app) as client:
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+    response = await async_client.get(url="/health/live")
+    assert response.status_code == 200
+
+
+def test_metrics(
+        ws_authenticated_client: TestClient,
+):
+    ws_authenticated_client.get("/chats/ddf79876-07e4-4340-af35-a44daa778c19")
+    with ws_authenticated_client.websocket_connect("chats/ws/my"):
+        response = ws_authenticated_client.get("/metrics")
+    assert response.status_code == 200
+    metrics = response.text
+    assert (
+        'walk_chat_http_request_duration_seconds_count{method="GET",route="/chats/{chat_id}",status="200"}'
+        in metrics
+    )
+    assert 'walk_chat_ws_connections{stream="user"} 1.0' in metrics
+    assert 'walk_chat_db_pool_checkout_wait_seconds_total{pool="primary"}' in metrics
+    # сокет проверил токен, поэтому в кэше JWT есть хотя бы промах
+    assert 'walk_chat_cache_misses_total{cache="jwt"}' in metrics
@@ -0,0 +1,75 @@
+import datetime
+import uuid
+from contextlib import asynccontextmanager
+
+from app.repositories.archive import MessageArchive
+from app.schemas.messages import MessageSchema
+from app.services.retention import MessageRetentionJob
+from tests.dependencies.logger import get_mocked_logger
+
+
+def make_message(chat_id: uuid.UUID, created_at: datetime.datetime) -> MessageSchema:
+    return MessageSchema(
+        message_id=uuid.uuid4(),
+        chat_id=chat_id,
+        user_id=uuid.uuid4(),
+        message_content=created_at.isoformat(),
+        created_at=created_at,
+    )
+
+
+async def test_archive_pages_across_months(tmp_path):
+    chat_id, other_chat_id = uuid.uuid4(), uuid.uuid4()
+    january = [make_message(chat_id, datetime.datetime(2026, 1, day)) for day in (1, 2, 3)]
+    february = [make_message(chat_id, datetime.datetime(2026, 2, day)) for day in (1, 2)]
+    archive = MessageArchive(str(tmp_path))
+    for month, messages in ((datetime.date(2026, 1, 1), january), (datetime.date(2026, 2, 1), february)):
+        writer = archive.begin_month(month)
+        writer.write_chat(chat_id, messages)
+        writer.write_chat(other_chat_id, [make_message(other_chat_id, messages[0].created_at)])
+        writer.commit()
+
+    assert archive.boundary() == datetime.datetime(2026, 3, 1)
+    newest_first = await archive.read_before(chat_id, None, 4)
+    assert newest_first == [*reversed(february), january[2], january[1]]
+    edge = (newest_first[-1].created_at, newest_first[-1].message_id)
+    assert await archive.read_before(chat_id, edge, 10) == [january[0]]
+    start = (january[0].created_at, january[0].message_id)
+    assert await archive.read_after(chat_id, start, 3) == [january[1], january[2], february[0]]
+
+
+class FakePartitionsRepository:
+    def __init__(self, months: list[datetime.date]):
+        self.months = months
+        self.exported: list[datetime.date] = []
+
+    @asynccontextmanager
+    async def maintenance_lock(self):
+        yield True
+
+    async def list_partitions(self) -> list[datetime.date]:
+        return sorted(self.months)
+
+    async def create_partition(self, month: datetime.date) -> None:
+        self.months.append(month)
+
+    async def export_partition(self, month, writer) -> None:
+        self.exported.append(month)
+
+    async def drop_partition(self, month: datetime.date) -> None:
+        self.months.remove(month)
+
+
+async def test_retention_creates_future_and_archives_old_partitions(tmp_path):
+    repository = FakePartitionsRepository([datetime.date(2026, 1, 1), datetime.date(2026, 9, 1)])
+    job = MessageRetentionJob(
+        repository, MessageArchive(str(tmp_path)), get_mocked_logger(),
+        partitions_ahead=2, retention_days=180,
+    )
+    await job.run_once(today=datetime.date(2026, 10, 18))
+
+    assert repository.exported == [datetime.date(2026, 1, 1)]
+    assert sorted(repository.months) == [
+        datetime.date(2026, 9, 1), datetime.date(2026, 10, 1), datetime.date(2026, 11, 1), datetime.date(2026, 12, 1),
+    ]
+    assert job.archive.months() == [datetime.date(2026, 1, 1)]
@@ -0,0 +1,20 @@
+from app.brokers.backplane import LoopbackBackplane
+from tests.dependencies.logger import get_mocked_logger
+
+
+async def test_loopback_backplane_skips_origin():
+    backplane = LoopbackBackplane(logger=get_mocked_logger())
+    received = {"node-a": [], "node-b": []}
+
+    async def handler_a(kind: str, data: dict):
+        received["node-a"].append((kind, data))
+
+    async def handler_b(kind: str, data: dict):
+        received["node-b"].append((kind, data))
+
+    backplane.subscribe("node-a", handler_a)
+    backplane.subscribe("node-b", handler_b)
+    await backplane.publish("node-a", "message", {"message_content": "hi"})
+
+    assert received["node-a"] == []
+    assert received["node-b"] == [("message", {"message_content": "hi"})]
@@ -0,0 +1,53 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.schemas.chats import ChatCreateSchema
+from app.schemas.messages import MessageCreateSchema
+from app.services.batching import MessageBatchWriter
+from benchmarks.fakes import InMemoryChatsRepository
+from tests.dependencies.logger import get_mocked_logger
+
+
+class FailingRepository(InMemoryChatsRepository):
+    """Откатывает любую пачку, в которой есть сообщение "bad"."""
+
+    async def create_messages(self, messages_data):
+        if any(message.message_content == "bad" for message in messages_data):
+            raise RuntimeError("constraint violated")
+        return await super().create_messages(messages_data)
+
+
+async def test_failed_batch_fails_only_the_bad_message():
+    repository = FailingRepository()
+    [chat] = await repository.create_chats([ChatCreateSchema(user1_id=uuid.uuid4(), user2_id=uuid.uuid4())])
+    writer = MessageBatchWriter(repository, get_mocked_logger(), batch_size=10, window_ms=50)
+    await writer.start()
+
+    def write(content: str):
+        return writer.write(MessageCreateSchema(chat_id=chat.chat_id, user_id=chat.user1_id, message_content=content))
+
+    good, bad, other = await asyncio.gather(write("hi"), write("bad"), write("there"), return_exceptions=True)
+    await writer.stop()
+
+    assert (good.message_content, other.message_content) == ("hi", "there")
+    assert isinstance(bad, RuntimeError)
+
+
+async def test_stop_writes_accepted_messages():
+    repository = InMemoryChatsRepository()
+    [chat] = await repository.create_chats([ChatCreateSchema(user1_id=uuid.uuid4(), user2_id=uuid.uuid4())])
+    writer = MessageBatchWriter(repository, get_mocked_logger(), batch_size=10, window_ms=1000)
+    await writer.start()
+    pending = asyncio.ensure_future(
+        writer.write(MessageCreateSchema(chat_id=chat.chat_id, user_id=chat.user1_id, message_content="hi"))
+    )
+    # _run уже забрал сообщение из очереди и ждёт окончания окна
+    await asyncio.sleep(0.01)
+    await writer.stop()
+
+    message = await asyncio.wait_for(pending, 1)
+    assert message.message_content == "hi"
+    with pytest.raises(asyncio.QueueEmpty):
+        writer.queue.get_nowait()
@@ -0,0 +1,12 @@
+from benchmarks.scenarios import QUICK_PARAMS, run_kafka_ingest, run_rest, run_ws_fanout
+
+
+async def test_benchmark_scenarios_run():
+    rest = await run_rest(db_latency_ms=0, **QUICK_PARAMS["rest"])
+    assert rest["errors"] == 0
+    fanout = await run_ws_fanout(db_latency_ms=0, **QUICK_PARAMS["ws_fanout"])
+    assert fanout["evicted"] == 0
+    assert fanout["db_calls_per_message"] < 1
+    ingest = await run_kafka_ingest(db_latency_ms=0, **QUICK_PARAMS["kafka_ingest"])
+    assert ingest["records_per_s"] > 0
+    assert ingest["duplicates"] > 0
@@ -0,0 +1,60 @@
+import datetime
+import uuid
+
+from app.caches.history import RecentMessagesBuffer
+from app.caches.lru import MISSING, TTLCache
+from app.filters.messages import MessagesFilter
+from app.schemas.messages import MessageSchema
+
+
+def test_ttl_cache_expires_and_evicts_lru():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("missing", None, ttl=1)
+    assert cache.get("missing") is None
+    now[0] = 2
+    assert cache.get("missing") is MISSING
+
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_recent_messages_buffer_serves_warmed_chat():
+    chat_id = uuid.uuid4()
+
+    def message(second: int) -> MessageSchema:
+        return MessageSchema(
+            message_id=uuid.uuid4(),
+            chat_id=chat_id,
+            user_id=chat_id,
+            message_content=str(second),
+            created_at=datetime.datetime(2025, 1, 1, 0, 0, second),
+        )
+
+    buffer = RecentMessagesBuffer(per_chat=3, max_messages=10, max_chats=10)
+    assert buffer.get(chat_id, MessagesFilter(limit=2)) is None
+    buffer.begin_warm(chat_id)
+    buffer.append(message(3))
+    buffer.warm(chat_id, [message(2), message(1)])
+    buffer.append(message(4))
+
+    messages = buffer.get(chat_id, MessagesFilter(limit=3))
+    assert [message.message_content for message in messages] == ["4", "3", "2"]
+    assert buffer.get(chat_id, MessagesFilter(limit=3, offset=1)) is None
+
+
+def test_recent_messages_buffer_caps_empty_chats():
+    buffer = RecentMessagesBuffer(per_chat=3, max_messages=10, max_chats=2)
+    chat_ids = [uuid.uuid4() for _ in range(3)]
+    for chat_id in chat_ids:
+        buffer.begin_warm(chat_id)
+        buffer.warm(chat_id, [])
+
+    assert buffer.stats()["chats"] == 2
+    assert buffer.get(chat_ids[0], MessagesFilter(limit=1)) is None
+    assert buffer.get(chat_ids[2], MessagesFilter(limit=1)) == []
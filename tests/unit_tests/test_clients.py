@@ -0,0 +1,59 @@
+import asyncio
+import uuid
+from unittest.mock import AsyncMock
+
+from app.brokers.backplane import LoopbackBackplane
+from app.caches.history import RecentMessagesBuffer
+from app.managers.clients import ClientConnection, QueueDepth
+from app.managers.connections import ConnectionManager
+from tests.dependencies.logger import get_mocked_logger
+
+
+async def test_client_connection_drops_on_overflow():
+    websocket = AsyncMock(scope={})
+    connection = ClientConnection(websocket=websocket, queue_size=2, stream="chat", key=uuid.uuid4())
+    assert connection.offer("first")
+    assert connection.offer("second")
+    assert not connection.offer("third")
+    assert connection.dropped == 1
+    assert connection.queue.qsize() == 2
+
+
+async def test_send_does_not_block_after_writer_died():
+    connection = ClientConnection(websocket=AsyncMock(scope={}), queue_size=1, stream="chat", key=uuid.uuid4())
+    await connection.accept()
+    connection._writer.cancel()
+    await asyncio.sleep(0)
+    assert connection.offer("first")
+
+    await asyncio.wait_for(connection.send("second"), 1)
+    assert connection.closed
+    assert connection.dropped == 1
+
+
+async def test_evicted_connection_close_task_is_tracked():
+    manager = ConnectionManager(
+        chats_service=AsyncMock(),
+        backplane=LoopbackBackplane(logger=get_mocked_logger()),
+        history=RecentMessagesBuffer(per_chat=3, max_messages=10, max_chats=10),
+        queue_size=1,
+    )
+    connection = await manager.connect_chat(uuid.uuid4(), AsyncMock(scope={}))
+    manager._evict(connection)
+    assert len(manager._closing) == 1
+    await asyncio.gather(*manager._closing)
+    await asyncio.sleep(0)
+    assert not manager._closing
+    assert connection.closed
+
+
+async def test_queue_depth_follows_enqueue_send_and_close():
+    depth = QueueDepth()
+    websocket = AsyncMock(scope={})
+    connection = ClientConnection(websocket=websocket, queue_size=4, stream="chat", key=uuid.uuid4(), depth=depth)
+    assert connection.offer("first")
+    assert connection.offer("second")
+    assert depth.frames == 2
+
+    await connection.close()
+    assert depth.frames == 0
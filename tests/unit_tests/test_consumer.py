@@ -0,0 +1,121 @@
+import uuid
+from unittest.mock import AsyncMock
+
+import pytest
+from aiokafka import TopicPartition
+from aiokafka.errors import KafkaConnectionError
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.brokers.consumer import KafkaConsumer
+from app.brokers.flow import FlowController
+from app.configs.main import settings
+from app.schemas.chats import ChatCreateSchema
+from benchmarks.fakes import FakeKafkaProducer, FakeKafkaSource, make_match_record
+from tests.dependencies.logger import get_mocked_logger
+
+
+async def make_consumer(flow: FlowController = None) -> KafkaConsumer:
+    consumer = KafkaConsumer(
+        kafka_url="localhost:9092",
+        group_id="test",
+        chats_service=AsyncMock(),
+        ws_manager=AsyncMock(),
+        producer=FakeKafkaProducer(),
+        logger=get_mocked_logger(),
+        workers=1,
+        flow=flow,
+    )
+    # настоящий AIOKafkaConsumer не запускался, закрываем его до подмены
+    await consumer.consumer.stop()
+    consumer.consumer = FakeKafkaSource([])
+    return consumer
+
+
+class RebalancingSource(FakeKafkaSource):
+    """Во время паузы забирает партицию 0 и назначает новую, ещё не приостановленную."""
+
+    def __init__(self, records):
+        super().__init__(records)
+        self.polls = 0
+        self.revoked = TopicPartition("matches", 0)
+
+    def assignment(self) -> set[TopicPartition]:
+        partitions = set(self.partitions)
+        if self.polls:
+            partitions.discard(self.revoked)
+        return partitions
+
+    def resume(self, *partitions: TopicPartition) -> None:
+        assert self.revoked not in partitions
+        super().resume(*partitions)
+
+    async def getmany(self, timeout_ms: int = 0, max_records=None) -> dict:
+        self.polls += 1
+        if self.polls == 1:
+            # партиция 1 назначена после pause, её записи успели выбраться
+            self._paused.discard(TopicPartition("matches", 1))
+        return await super().getmany(timeout_ms, max_records)
+
+
+async def test_backpressure_keeps_records_fetched_while_paused():
+    load = {"value": 10}
+    flow = FlowController(probes={"in_flight": (lambda: load["value"], 10)}, resume_ratio=0.5)
+    consumer = await make_consumer(flow)
+    records = [make_match_record("matches", partition, 0, b"{}") for partition in (0, 1)]
+    consumer.consumer = source = RebalancingSource(records)
+
+    def relieved() -> bool:
+        if source.polls >= 2:
+            load["value"] = 0
+        return load["value"] == 0
+
+    flow.relieved = relieved
+    await consumer._apply_backpressure()
+
+    partition = TopicPartition("matches", 1)
+    assert source.positions[partition] == 0
+    assert not source.paused() & source.assignment()
+    assert (consumer.pauses_total, consumer.resumes_total, consumer.paused) == (1, 1, False)
+
+
+async def test_transient_db_errors_are_not_dead_lettered(monkeypatch):
+    monkeypatch.setattr(settings.kafka, "KAFKA_CONSUMER_RETRY_BACKOFF_MS", 0)
+    consumer = await make_consumer()
+    outage = OperationalError("INSERT", {}, ConnectionRefusedError())
+    consumer.chats_service.create_chats.side_effect = outage
+    consumer.chats_service.create_chat.side_effect = outage
+    record = make_match_record("matches", 0, 0, b"{}")
+    chat_data = ChatCreateSchema(user1_id=uuid.uuid4(), user2_id=uuid.uuid4())
+
+    with pytest.raises(OperationalError):
+        await consumer._persist_matches([(record, chat_data)])
+    assert consumer.counters["dead_lettered"] == 0
+
+
+async def test_constraint_violations_are_dead_lettered():
+    consumer = await make_consumer()
+    violation = IntegrityError("INSERT", {}, Exception("check constraint"))
+    consumer.chats_service.create_chats.side_effect = violation
+    consumer.chats_service.create_chat.side_effect = violation
+    record = make_match_record("matches", 0, 0, b"{}")
+    chat_data = ChatCreateSchema(user1_id=uuid.uuid4(), user2_id=uuid.uuid4())
+
+    await consumer._persist_matches([(record, chat_data)])
+    assert consumer.counters["dead_lettered"] == 1
+    assert consumer.producer.counters["sent"] == 1
+
+
+class UnavailableProducer(FakeKafkaProducer):
+    async def send_batch(self, records):
+        raise KafkaConnectionError("dead-letter topic is unavailable")
+
+
+async def test_batch_is_not_committed_when_dead_letter_delivery_fails():
+    consumer = await make_consumer()
+    consumer.producer = UnavailableProducer()
+    consumer.consumer = source = FakeKafkaSource([make_match_record("matches", 0, 0, b"not json")])
+
+    with pytest.raises(KafkaConnectionError):
+        await consumer.process_messages()
+    assert source.commits == {}
+    assert consumer.counters["dead_lettered"] == 0
@@ -0,0 +1,17 @@
+import datetime
+import uuid
+
+import pytest
+
+from app.exceptions.common import InvalidCursorException
+from app.filters.cursors import decode_search_cursor, encode_search_cursor
+
+
+def test_search_cursor_round_trip():
+    created_at, message_id = datetime.datetime(2026, 1, 1, 12, 30), uuid.uuid4()
+    cursor = encode_search_cursor(0.0607927, created_at, message_id)
+    assert decode_search_cursor(cursor) == (0.0607927, created_at, message_id)
+    with pytest.raises(InvalidCursorException):
+        decode_search_cursor("not-a-cursor")
+    with pytest.raises(InvalidCursorException):
+        decode_search_cursor(cursor.split(".")[0] + ".bm90LWEtbnVtYmVy")
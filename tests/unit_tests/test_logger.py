@@ -0,0 +1,39 @@
+import json
+import logging
+import queue
+
+from app.logger import DroppingQueueHandler, JsonFormatter, SamplingFilter
+
+
+def make_record(msg: str, *args, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("walk-profile", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_formats_lazily_with_extra():
+    entry = json.loads(JsonFormatter().format(make_record("Received match from %s", "matches", offset=7)))
+    assert entry["message"] == "Received match from matches"
+    assert entry["level"] == "INFO"
+    assert entry["offset"] == 7
+
+
+def test_sampling_filter_rate_limits_per_key():
+    now = [0.0]
+    sampling = SamplingFilter(sample_rate=1.0, rate_limit=2, clock=lambda: now[0])
+    passed = [sampling.filter(make_record("event", sample_key="match")) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert sampling.filter(make_record("other"))
+
+    now[0] = 1
+    record = make_record("event", sample_key="match")
+    assert sampling.filter(record)
+    assert record.suppressed == 3
+
+
+def test_queue_handler_drops_when_full():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(make_record("first"))
+    handler.handle(make_record("second"))
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().getMessage() == "first"
@@ -0,0 +1,77 @@
+import asyncio
+from typing import Hashable
+
+import pytest
+
+from app.brokers.pool import KeyedWorkerPool
+from tests.dependencies.logger import get_mocked_logger
+
+
+def key(item: tuple) -> Hashable:
+    return item[0]
+
+
+async def test_items_with_same_key_keep_order_across_dispatches():
+    handled = []
+
+    async def handler(items):
+        await asyncio.sleep(0)
+        handled.extend(items)
+
+    pool = KeyedWorkerPool(4, handler, get_mocked_logger())
+    pool.start()
+    await asyncio.gather(*(pool.dispatch([("a", index), ("b", index)], key=key) for index in range(5)))
+    await pool.stop()
+
+    assert [index for name, index in handled if name == "a"] == list(range(5))
+    assert [index for name, index in handled if name == "b"] == list(range(5))
+
+
+async def test_different_keys_run_in_parallel():
+    running, peak = 0, 0
+
+    async def handler(items):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    pool = KeyedWorkerPool(2, handler, get_mocked_logger())
+    pool.start()
+    # hash целого числа — само число, ключи 0 и 1 попадают в разные воркеры
+    await pool.dispatch([(0, 1), (1, 1)], key=key)
+    await pool.stop()
+
+    assert peak == 2
+
+
+async def test_worker_error_reaches_dispatch():
+    async def handler(items):
+        if any(name == "bad" for name, _ in items):
+            raise ValueError("broken batch")
+
+    pool = KeyedWorkerPool(2, handler, get_mocked_logger())
+    pool.start()
+    with pytest.raises(ValueError):
+        await pool.dispatch([("bad", 1), ("good", 1)], key=key)
+    # воркер пережил ошибку и обрабатывает следующие пачки
+    await pool.dispatch([("good", 2)], key=key)
+    await pool.stop()
+
+
+async def test_stats_count_processed_items_per_worker():
+    async def handler(items):
+        pass
+
+    pool = KeyedWorkerPool(2, handler, get_mocked_logger())
+    pool.start()
+    await pool.dispatch([("a", 1), ("a", 2), ("b", 1)], key=key)
+    await pool.stop()
+
+    stats = pool.stats()
+    assert [worker["worker"] for worker in stats] == [0, 1]
+    assert sum(worker["processed"] for worker in stats) == 3
+    assert all(worker["lag"] == 0 for worker in stats)
+    busy = stats[hash("a") % 2]
+    assert busy["processed"] >= 2 and busy["batches"] >= 1
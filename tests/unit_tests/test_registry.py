@@ -0,0 +1,30 @@
+import uuid
+from unittest.mock import AsyncMock
+
+from app.managers.clients import ClientConnection
+from app.managers.registry import CHAT_STREAM, USER_STREAM, ConnectionRegistry
+
+
+def make_connection(stream: str, key: uuid.UUID) -> ClientConnection:
+    return ClientConnection(websocket=AsyncMock(scope={}), queue_size=1, stream=stream, key=key)
+
+
+def test_registry_keeps_user_and_chat_indexes_apart():
+    registry = ConnectionRegistry()
+    shared_id = uuid.uuid4()
+    user_connection = make_connection(USER_STREAM, shared_id)
+    chat_connection = make_connection(CHAT_STREAM, shared_id)
+    registry.add(user_connection)
+    registry.add(chat_connection)
+
+    assert registry.user_connections(shared_id) == {user_connection}
+    assert registry.chat_connections(shared_id) == {chat_connection}
+    assert registry.find(chat_connection.websocket) is chat_connection
+    assert registry.counts() == {USER_STREAM: 1, CHAT_STREAM: 1}
+    assert registry.memory_footprint()["bytes_per_connection"] > 0
+
+    assert registry.remove(chat_connection)
+    assert not registry.remove(chat_connection)
+    assert not registry.chat_connections(shared_id)
+    assert registry.user_connections(shared_id) == {user_connection}
+    assert len(registry) == 1
@@ -0,0 +1,19 @@
+import uuid
+
+import pytest
+
+from app.exceptions.auth import InvalidTokenException
+from app.utils import get_current_user_id, verified_tokens_cache
+from tests.dependencies.users import make_token
+
+
+def test_get_current_user_id_caches_verified_token():
+    user_id = uuid.uuid4()
+    token = make_token(user_id, expires_in=60)
+    hits = verified_tokens_cache.hits
+    assert get_current_user_id(token) == user_id
+    assert get_current_user_id(token) == user_id
+    assert verified_tokens_cache.hits == hits + 1
+
+    with pytest.raises(InvalidTokenException):
+        get_current_user_id(make_token(user_id, expires_in=-1))